@@ -0,0 +1,57 @@
+"""
+Size and encode-time benchmark for the compressed audiobook formats.
+
+Encodes a WAV audiobook (default: the first .wav in audiobooks/) with every
+supported format at a few bitrates and prints output size, compression
+ratio and encode speed relative to real time.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_audio_formats [wav]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from backend.controllers.transcoder import AUDIO_FORMATS, encode
+
+BITRATES = {
+    "opus": ["24k", "48k", "96k"],
+    "mp3": ["64k", "96k", "128k"],
+    "aac": ["64k", "96k", "128k"],
+    "wav": [None],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", nargs="?", help="WAV file to encode")
+    args = parser.parse_args()
+
+    source = Path(args.wav) if args.wav else next(Path("audiobooks").glob("*.wav"))
+    with wave.open(str(source), "rb") as w:
+        duration = w.getnframes() / w.getframerate()
+    source_size = source.stat().st_size
+
+    print(f"{source}: {duration:.0f} s, {source_size / 1024 / 1024:.1f} MB")
+    print(f"{'format':>6} {'bitrate':>8} {'MB':>8} {'ratio':>7} {'seconds':>8} {'x realtime':>11}")
+
+    out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+    try:
+        for audio_format, spec in AUDIO_FORMATS.items():
+            for bitrate in BITRATES[audio_format]:
+                output = out_dir / f"out_{bitrate}.{spec['ext']}"
+                start = time.perf_counter()
+                encode(str(source), str(output), audio_format, bitrate)
+                elapsed = time.perf_counter() - start
+                size = output.stat().st_size
+                print(f"{audio_format:>6} {bitrate or '-':>8} {size / 1024 / 1024:>8.2f} "
+                      f"{source_size / size:>6.1f}x {elapsed:>8.2f} {duration / elapsed:>10.0f}x")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
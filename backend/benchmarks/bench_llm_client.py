@@ -0,0 +1,88 @@
+"""
+Event-loop responsiveness while LLM requests are in flight.
+
+Fires N concurrent prompts at the offline local backend (each taking
+--delay seconds) and measures how late a 10 ms heartbeat task runs, which
+is what every other request on the worker experiences. Compares:
+  blocking  the handlers' previous behaviour: a synchronous call on the loop
+  client    LLMClient with LLM_CONCURRENCY slots and per-call timeouts
+  cached    the same prompts again, answered from the response cache
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_llm_client [--requests N] [--delay S] [--concurrency N]
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+
+from backend.controllers.llm_client import LLMClient, LocalBackend, LLM_CONCURRENCY
+from backend.controllers.response_cache import ResponseCache
+
+
+async def heartbeat(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+async def measure(run):
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0)  # Let the heartbeat start its first tick
+    start = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return elapsed, max(lags, default=0.0)
+
+
+async def bench(args):
+    backend = LocalBackend(delay=args.delay)
+    client = LLMClient(backend, concurrency=args.concurrency)
+    prompts = [f"Document {i}. It has a few sentences. This is the last one." for i in range(args.requests)]
+
+    async def blocking():
+        for prompt in prompts:
+            time.sleep(args.delay)  # What a synchronous generate_content does to the loop
+            backend._answer(prompt)
+
+    cache_dir = tempfile.mkdtemp(prefix="astra_bench_")
+    try:
+        cache = ResponseCache(cache_dir)
+
+        async def cached():
+            await asyncio.gather(*(
+                cache.get_or_generate("summarize", p, client.config, lambda p=p: client.generate(p)) for p in prompts
+            ))
+
+        variants = {
+            "blocking": blocking,
+            "client": lambda: asyncio.gather(*(client.generate(p) for p in prompts)),
+            "cached": cached,
+        }
+        await cached()  # Fill the cache so the "cached" row measures hits
+
+        print(f"{args.requests} requests, {args.delay:g} s each, {args.concurrency} slots")
+        print(f"{'variant':>9} {'seconds':>9} {'max lag ms':>11}")
+        for name, run in variants.items():
+            elapsed, lag = await measure(run)
+            print(f"{name:>9} {elapsed:>9.2f} {lag:>11.1f}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds per simulated LLM call")
+    parser.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Throughput benchmark for parallel OCR ingestion.
+
+Rasterizes and OCRs pages of the PDFs in uploads/ (as if they were scans)
+with 1, 2, 4 and N worker processes and prints pages per second.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_ocr_throughput [--max-pages N] [--dpi DPI] [pdf ...]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fitz
+
+from backend.controllers.ocr_engine import _init_worker, _ocr_pdf_page, _run, OCR_DPI
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", help="PDFs to OCR (default: every PDF in uploads/)")
+    parser.add_argument("--max-pages", type=int, default=64, help="Total pages to OCR")
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    args = parser.parse_args()
+
+    pdfs = [Path(p) for p in args.pdfs] or sorted(Path("uploads").glob("*.pdf"))
+    tasks = []
+    for pdf_path in pdfs:
+        with fitz.open(str(pdf_path)) as pdf:
+            for page_num in range(pdf.page_count):
+                tasks.append((_ocr_pdf_page, str(pdf_path), page_num, args.dpi))
+    tasks = tasks[:args.max_pages]
+
+    cpu_count = os.cpu_count() or 1
+    print(f"{len(tasks)} pages from {len(pdfs)} PDFs at {args.dpi} dpi")
+    print(f"{'workers':>8} {'seconds':>10} {'pages/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in sorted({1, 2, 4, cpu_count}):
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pool.submit(_init_worker).result()  # Start a worker before timing
+            start = time.perf_counter()
+            _run(pool, tasks)
+            elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.1f} {len(tasks) / elapsed:>10.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Write transactions and throughput of reading-progress updates.
+
+Builds a throwaway SQLite database and fires --turns progress updates
+(random documents, pages moving forward) at PUT /documents/update-progress
+with --connections requests in flight, then counts the commits that reached
+the database and the updates that failed ("database is locked"):
+  direct    one UPDATE + COMMIT (and job refocus) per page turn, as before
+  buffered  the real route: ProgressBuffer, flushed every --interval seconds
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_progress_writes [--turns N] [--documents N] [--connections N] [--interval S]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Body, Depends, FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.controllers.job_queue import follow_reader
+from backend.controllers.progress_buffer import progress_buffer
+from backend.database import make_engine, async_url, get_async_db
+from backend.routers import documents
+
+USER_ID = "bench@example.com"
+PAGES = 300
+
+
+def fill(engine, count: int):
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.User(email=USER_ID, name="bench", password="-"))
+    db.add_all([
+        models.Document(document_id=d, title=f"Document {d}", user_id=USER_ID, file_path="-", length=PAGES)
+        for d in range(1, count + 1)
+    ])
+    db.commit()
+    db.close()
+
+
+def direct_app(get_db) -> FastAPI:
+    app = FastAPI()
+
+    @app.put("/documents/update-progress/{document_id}")
+    async def update_progress(document_id: int, progress: int = Body(...), db: AsyncSession = Depends(get_db)):
+        document = await db.get(models.Document, document_id)
+        document.progress = progress
+        await db.commit()
+        await db.run_sync(follow_reader, document_id, progress)
+        return {"message": "Document progress updated successfully"}
+
+    return app
+
+
+def buffered_app(get_db) -> FastAPI:
+    app = FastAPI()
+    app.include_router(documents.document_router)
+    app.dependency_overrides[get_async_db] = get_db
+    return app
+
+
+async def turn_pages(app, turns: int, documents_count: int, connections: int, buffered: bool):
+    rng = random.Random(1)
+    pages = {}
+    plan = []
+    for _ in range(turns):
+        document_id = rng.randint(1, documents_count)
+        pages[document_id] = min(pages.get(document_id, 0) + 1, PAGES)
+        plan.append((document_id, pages[document_id]))
+
+    queue = iter(plan)
+    failed = 0
+    if buffered:
+        progress_buffer.start()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def connection():
+            nonlocal failed
+            for document_id, page in queue:
+                response = await client.put(f"/documents/update-progress/{document_id}", json=page)
+                failed += response.status_code >= 400
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+    if buffered:
+        await progress_buffer.stop()
+    return elapsed, pages, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=1.0, help="Flush interval of the buffer, in seconds")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # The route logs every update
+
+    out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+    try:
+        print(f"{args.turns} page turns over {args.documents} documents, {args.connections} connections")
+        print(f"{'variant':>9} {'seconds':>8} {'turns/s':>8} {'commits':>8} {'failed':>7} {'correct':>8}")
+        for name, make_app in (("direct", direct_app), ("buffered", buffered_app)):
+            url = f"sqlite:///{out_dir / f'{name}.db'}"
+            engine = make_engine(url)
+            fill(engine, args.documents)
+            async_engine = make_engine(async_url(url), create=create_async_engine)
+            commits = []
+            event.listen(async_engine.sync_engine, "commit", lambda conn: commits.append(1))
+            sessions = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+            async def get_db():
+                async with sessions() as db:
+                    yield db
+
+            progress_buffer.session_factory = sessions
+            progress_buffer.interval = args.interval
+            elapsed, pages, failed = asyncio.run(turn_pages(make_app(get_db), args.turns, args.documents, args.connections, name == "buffered"))
+
+            db = sessionmaker(bind=engine)()
+            stored = dict(db.query(models.Document.document_id, models.Document.progress).all())
+            db.close()
+            correct = all(stored[d] == page for d, page in pages.items())
+            print(f"{name:>9} {elapsed:>8.2f} {args.turns / elapsed:>8.0f} {len(commits):>8} {failed:>7} {str(correct):>8}")
+            engine.dispose()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark for TTS text sanitization.
+
+Extracts the text of the PDFs in uploads/ and times the previous
+seven-pass `sanitize_text` against the current normalizer, page by page
+and as one batch per document. Also reports how many sentence chunks
+each produces for TTS.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_sanitize [--repeat N] [pdf ...]
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+import fitz
+
+from backend.controllers.text_normalizer import sanitize_text, sanitize_pages, split_sentences
+
+UPLOAD_DIR = Path("uploads")
+
+
+def sanitize_text_legacy(input_text):
+    """sanitize_text as it was in routers/audiobook.py, kept for comparison."""
+    sanitized = re.sub(r'[^\x00-\x7F]+', ' ', input_text)
+    sanitized = re.sub(r'[^\w\s.,!?]', '', sanitized)
+    sanitized = re.sub(r'\s+', ' ', sanitized).strip()
+    sanitized = re.sub(r'([a-z])([A-Z])', r'\1 \2', sanitized)
+    sanitized = re.sub(r'([A-Z]{2,})([a-z])', r'\1 \2', sanitized)
+    sanitized = re.sub(r'(?<![.!?])\n', '.\n', sanitized)
+    sanitized = re.sub(r'(?<![.!?])$', '.', sanitized)
+    return sanitized
+
+
+def load_documents(pdfs):
+    documents = []
+    for pdf_path in pdfs:
+        with fitz.open(str(pdf_path)) as pdf:
+            documents.append([page.get_text() for page in pdf])
+    return documents
+
+
+def measure(run, documents, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [run(pages) for pages in documents]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", help="PDFs to read (default: every PDF in uploads/)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the best is reported")
+    args = parser.parse_args()
+
+    pdfs = [Path(p) for p in args.pdfs] or sorted(UPLOAD_DIR.glob("*.pdf"))
+    documents = load_documents(pdfs)
+    pages = sum(len(d) for d in documents)
+    chars = sum(len(text) for d in documents for text in d)
+    print(f"{len(pdfs)} PDFs, {pages} pages, {chars / 1024 / 1024:.2f} MB of text")
+
+    variants = {
+        "legacy": lambda d: [sanitize_text_legacy(text) for text in d],
+        "per page": lambda d: [sanitize_text(text) for text in d],
+        "batch": sanitize_pages,
+        "unicode": lambda d: sanitize_pages(d, keep_unicode=True),
+    }
+    print(f"{'variant':>10} {'ms':>9} {'MB/s':>8} {'speedup':>8} {'chunks':>8}")
+    baseline = None
+    for name, run in variants.items():
+        elapsed, result = measure(run, documents, args.repeat)
+        baseline = baseline or elapsed
+        chunks = sum(len(split_sentences(text)) for d in result for text in d if text)
+        print(f"{name:>10} {elapsed * 1000:>9.1f} {chars / 1024 / 1024 / elapsed:>8.1f} {baseline / elapsed:>7.2f}x {chunks:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Query-latency benchmark for full-text search.
+
+Builds a throwaway SQLite database with a synthetic library (default 2000
+documents of 30 pages, plus notes and bookmarks), indexes it through the
+same triggers the app uses and times /search queries against it.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_search [--documents N] [--pages N] [--queries N]
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.controllers.page_store import build_pages
+from backend.controllers.search_index import create_search_index, search
+
+USER_ID = "bench@example.com"
+
+
+def make_vocabulary(size: int):
+    rng = random.Random(1)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def fill_library(db, vocabulary, documents: int, pages: int):
+    rng = random.Random(2)
+    db.add(models.User(email=USER_ID, name="bench", password="-"))
+    for document_id in range(1, documents + 1):
+        db.add(models.Document(document_id=document_id, title=f"Document {document_id}", user_id=USER_ID, file_path="-", length=pages))
+        texts = [" ".join(rng.choices(vocabulary, k=300)) for _ in range(pages)]
+        db.add_all(build_pages(document_id, texts))
+        db.add(models.Note(document_id=document_id, note_title=rng.choice(vocabulary), content=" ".join(rng.choices(vocabulary, k=40)), page=1))
+        db.add(models.Bookmark(document_id=document_id, page_number=1, description=" ".join(rng.choices(vocabulary, k=8))))
+        if document_id % 100 == 0:
+            db.commit()
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=30, help="Pages per document")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+    try:
+        engine = create_engine(f"sqlite:///{out_dir / 'bench.db'}")
+        models.Base.metadata.create_all(engine)
+        create_search_index(engine)
+        db = sessionmaker(bind=engine)()
+
+        vocabulary = make_vocabulary(20000)
+        start = time.perf_counter()
+        fill_library(db, vocabulary, args.documents, args.pages)
+        print(f"Indexed {args.documents} documents x {args.pages} pages in {time.perf_counter() - start:.1f} s")
+
+        rng = random.Random(3)
+        queries = {
+            "one word": lambda: rng.choice(vocabulary),
+            "two words": lambda: f"{rng.choice(vocabulary)} {rng.choice(vocabulary)}",
+            "prefix": lambda: rng.choice(vocabulary)[:3],
+        }
+        print(f"{'query':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for name, make_query in queries.items():
+            timings = []
+            for _ in range(args.queries):
+                query = make_query()
+                start = time.perf_counter()
+                search(db, USER_ID, query)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name:>10} {statistics.median(timings):>8.1f} {p95:>8.1f} {timings[-1]:>8.1f}")
+        db.close()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
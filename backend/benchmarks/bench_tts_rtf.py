@@ -0,0 +1,84 @@
+"""
+Real-time factor of TTS synthesis on CPU, before and after batching.
+
+Takes the first pages of a PDF and compares:
+  file     one tts_to_file() per page, read back with AudioSegment.from_wav
+           (how pages were synthesized before)
+  memory   synthesize_chunks() one sentence at a time, waveforms kept in memory
+  batched  synthesize_chunks() with TTS_BATCH_SIZE sentences per forward pass
+
+RTF is synthesis time divided by the duration of the audio produced; lower
+is better and below 1.0 is faster than real time.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_tts_rtf [--voice VOICE] [--pages N] [--batch-size N] [--threads N] pdf
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import fitz
+import torch
+from pydub import AudioSegment
+
+from backend.controllers.model_registry import get_model
+from backend.controllers.synthesis_cache import split_chunks
+from backend.controllers.text_normalizer import sanitize_pages
+from backend.controllers.tts_inference import synthesize_chunks, sample_rate, supports_batching, TTS_BATCH_SIZE
+
+
+def load_pages(pdf_path: str, pages: int):
+    with fitz.open(pdf_path) as pdf:
+        texts = [page.get_text() for page in pdf][:pages]
+    return [text for text in sanitize_pages(texts) if text]
+
+
+def run_file(model, pages):
+    audio_seconds = 0.0
+    with tempfile.TemporaryDirectory(prefix="astra_bench_") as out_dir:
+        for page_num, text in enumerate(pages):
+            path = os.path.join(out_dir, f"page_{page_num}.wav")
+            model.tts_to_file(text=text, file_path=path)
+            audio_seconds += AudioSegment.from_wav(path).duration_seconds
+    return audio_seconds
+
+
+def run_memory(model, pages, batch_size: int):
+    rate = sample_rate(model)
+    samples = 0
+    for text in pages:
+        samples += sum(len(waveform) for waveform in synthesize_chunks(model, split_chunks(text), batch_size))
+    return samples / rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf")
+    parser.add_argument("--voice", default="tts_models/en/ljspeech/glow-tts")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=TTS_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="torch CPU threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    pages = load_pages(args.pdf, args.pages)
+    model = get_model(args.voice)
+    model.tts("Warm up.")  # First call pays for lazy initialization
+
+    print(f"{len(pages)} pages, voice {args.voice}, {args.threads} threads, batching supported: {supports_batching(model)}")
+    print(f"{'variant':>8} {'seconds':>9} {'audio s':>9} {'RTF':>7}")
+    variants = {
+        "file": lambda: run_file(model, pages),
+        "memory": lambda: run_memory(model, pages, 1),
+        "batched": lambda: run_memory(model, pages, args.batch_size),
+    }
+    for name, run in variants.items():
+        start = time.perf_counter()
+        audio_seconds = run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8} {elapsed:>9.1f} {audio_seconds:>9.1f} {elapsed / audio_seconds:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
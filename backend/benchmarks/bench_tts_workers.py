@@ -0,0 +1,76 @@
+"""
+Wall-clock benchmark for the parallel TTS pipeline.
+
+Synthesizes the PDFs in uploads/ with 1, 2, 4 and N worker processes and
+prints the time taken for each run.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_tts_workers [--voice VOICE] [--max-pages N] [pdf ...]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Measure raw synthesis; a warm sentence cache would make later runs look free
+os.environ.setdefault("SYNTHESIS_CACHE_MB", "0")
+
+import fitz
+
+from backend.controllers.tts_engine import shutdown_pools, synthesize_pages
+from backend.controllers.text_normalizer import sanitize_text
+
+UPLOAD_DIR = Path("uploads")
+
+
+def load_pages(pdf_path: Path, max_pages: int):
+    pages = []
+    with fitz.open(str(pdf_path)) as pdf:
+        for page_num, page in enumerate(pdf):
+            if max_pages and page_num >= max_pages:
+                break
+            text = sanitize_text(page.get_text())
+            if text.strip():
+                pages.append((page_num, text))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", help="PDFs to synthesize (default: every PDF in uploads/)")
+    parser.add_argument("--voice", default="tts_models/en/ljspeech/glow-tts")
+    parser.add_argument("--max-pages", type=int, default=8, help="Pages per PDF (0 for all)")
+    args = parser.parse_args()
+
+    pdfs = [Path(p) for p in args.pdfs] or sorted(UPLOAD_DIR.glob("*.pdf"))
+    pages_by_pdf = {pdf: load_pages(pdf, args.max_pages) for pdf in pdfs}
+    total_pages = sum(len(pages) for pages in pages_by_pdf.values())
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpu_count})
+
+    print(f"{len(pdfs)} PDFs, {total_pages} pages, voice {args.voice}")
+    print(f"{'workers':>8} {'seconds':>10} {'pages/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+        try:
+            start = time.perf_counter()
+            for pdf, pages in pages_by_pdf.items():
+                if pages:
+                    synthesize_pages(pages, str(out_dir / pdf.stem), args.voice, workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            # Each worker count gets a fresh pool, not the previous run's warm workers
+            shutdown_pools()
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.1f} {total_pages / elapsed:>10.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
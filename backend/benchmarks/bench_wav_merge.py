@@ -0,0 +1,86 @@
+"""
+Peak-memory benchmark for merging page audio into one audiobook.
+
+Writes a long synthetic document (one WAV per page, default 300 pages of
+45 s each) and compares the old `sum(AudioSegment...)` merge against
+StreamingWavWriter, reporting wall-clock time and the tracemalloc peak.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_wav_merge [--pages N] [--seconds S]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+
+from pydub import AudioSegment
+
+from backend.controllers.wav_writer import StreamingWavWriter
+
+FRAME_RATE = 22050  # Coqui LJSpeech models output 22.05 kHz mono 16 bit
+
+
+def write_pages(out_dir: Path, pages: int, seconds: float):
+    page_paths = []
+    frames = os.urandom(int(FRAME_RATE * seconds) * 2)
+    for page_num in range(pages):
+        page_path = out_dir / f"book.wav_page_{page_num}.wav"
+        with wave.open(str(page_path), "wb") as page:
+            page.setnchannels(1)
+            page.setsampwidth(2)
+            page.setframerate(FRAME_RATE)
+            page.writeframes(frames)
+        page_paths.append(page_path)
+    return page_paths
+
+
+def merge_with_sum(page_paths, output_path):
+    audio_segments = [AudioSegment.from_wav(str(p)) for p in page_paths]
+    combined_audio = sum(audio_segments)
+    combined_audio.export(str(output_path), format="wav")
+
+
+def merge_with_stream(page_paths, output_path):
+    with StreamingWavWriter(output_path) as writer:
+        for page_path in page_paths:
+            writer.append_wav(page_path)
+
+
+def measure(merge, page_paths, output_path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    merge(page_paths, output_path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=45.0, help="Audio length of each page")
+    args = parser.parse_args()
+
+    out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+    try:
+        page_paths = write_pages(out_dir, args.pages, args.seconds)
+        page_mb = page_paths[0].stat().st_size / 1024 / 1024
+        print(f"{args.pages} pages, {page_mb:.1f} MB per page, {page_mb * args.pages:.0f} MB total")
+        print(f"{'merge':>8} {'seconds':>10} {'peak MB':>10}")
+
+        for name, merge in (("stream", merge_with_stream), ("sum", merge_with_sum)):
+            output_path = out_dir / f"book_{name}.wav"
+            elapsed, peak = measure(merge, page_paths, output_path)
+            print(f"{name:>8} {elapsed:>10.1f} {peak / 1024 / 1024:>10.1f}")
+            output_path.unlink()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Requests/sec and tail latency of database-bound routes under many
+concurrent connections, sync Session versus AsyncSession.
+
+Builds a throwaway SQLite database (or uses --url, e.g. a scratch
+PostgreSQL database, whose tables are created and dropped) and serves a read-heavy mix (document
+view 70%, notes list 20%, progress update 10%) in-process through httpx's
+ASGI transport with --connections requests in flight:
+  sync   the handlers as they were: `async def` with a sync Session, so
+         every query runs on (and blocks) the event loop. Its pool gets a
+         connection per client: sessions are closed in the thread pool
+         while queries wait on the loop, so a smaller pool stalls until
+         DB_POOL_TIMEOUT instead of measuring anything
+  async  the real routers on get_async_db (aiosqlite / asyncpg)
+
+Usage (from the repository root):
+    python -m backend.benchmarks.load_async_db [--connections N] [--requests N] [--documents N] [--url URL]
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Body, Depends, FastAPI, HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend import models
+from backend.controllers.job_queue import follow_reader
+from backend.database import make_engine, async_url, get_async_db
+from backend.routers import documents, notes
+
+USER_ID = "bench@example.com"
+
+
+def fill(engine, count: int):
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.User(email=USER_ID, name="bench", password="-"))
+    for document_id in range(1, count + 1):
+        db.add(models.Document(document_id=document_id, title=f"Document {document_id}", user_id=USER_ID, file_path="-", length=300))
+        db.add_all([
+            models.Note(document_id=document_id, note_title=f"Note {n}", content="Some note text. " * 10, page=n + 1)
+            for n in range(5)
+        ])
+    db.commit()
+    db.close()
+
+
+def sync_app(engine) -> FastAPI:
+    """The same three routes with a sync Session, as the routers used it before."""
+    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    @app.get("/documents/view/{document_id}")
+    async def view_document(document_id: int, db: Session = Depends(get_db)):
+        document = db.query(models.Document).filter(models.Document.document_id == document_id).first()
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return {"document_id": document.document_id, "progress": document.progress, "length": document.length}
+
+    @app.get("/api/notes/{document_id}")
+    async def get_notes(document_id: int, db: Session = Depends(get_db)):
+        return db.query(models.Note).filter(models.Note.document_id == document_id).all()
+
+    @app.put("/documents/update-progress/{document_id}")
+    async def update_progress(document_id: int, progress: int = Body(...), db: Session = Depends(get_db)):
+        document = db.query(models.Document).filter(models.Document.document_id == document_id).first()
+        document.progress = progress
+        db.commit()
+        follow_reader(db, document_id, progress)
+        return {"message": "Document progress updated successfully"}
+
+    return app
+
+
+def async_app(url: str) -> FastAPI:
+    """The real routers, with get_async_db pointed at the benchmark database."""
+    AsyncSessionLocal = async_sessionmaker(bind=make_engine(async_url(url), create=create_async_engine),
+                                           autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(documents.document_router)
+    app.include_router(notes.router)
+    app.dependency_overrides[get_async_db] = get_bench_db
+    return app
+
+
+async def load(app, connections: int, requests: int, documents_count: int):
+    rng = random.Random(1)
+    plan = []
+    for _ in range(requests):
+        document_id = rng.randint(1, documents_count)
+        roll = rng.random()
+        if roll < 0.7:
+            plan.append(("GET", f"/documents/view/{document_id}", None))
+        elif roll < 0.9:
+            plan.append(("GET", f"/api/notes/{document_id}", None))
+        else:
+            plan.append(("PUT", f"/documents/update-progress/{document_id}", rng.randint(1, 300)))
+
+    latencies, errors = [], 0
+    queue = iter(plan)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def connection():
+            nonlocal errors
+            for method, path, body in queue:
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code >= 400
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=128, help="Requests in flight at once")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--url", help="Database to test instead of a temporary SQLite file")
+    args = parser.parse_args()
+
+    out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+    url = args.url or f"sqlite:///{out_dir / 'bench.db'}"
+    engine = make_engine(url, pool_size=args.connections, max_overflow=0)
+    try:
+        fill(engine, args.documents)
+
+        print(f"{args.requests} requests, {args.connections} concurrent connections")
+        print(f"{'setup':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+        for name, app in (("sync", sync_app(engine)), ("async", async_app(url))):
+            elapsed, latencies, errors = asyncio.run(load(app, args.connections, args.requests, args.documents))
+            p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+            print(f"{name:>6} {len(latencies) / elapsed:>8.0f} {statistics.median(latencies):>8.1f} {p99:>8.1f} {latencies[-1]:>8.1f} {errors:>7}")
+    finally:
+        if args.url:
+            models.Base.metadata.drop_all(engine)
+        engine.dispose()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
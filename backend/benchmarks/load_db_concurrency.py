@@ -0,0 +1,148 @@
+"""
+Read/write throughput of the database under concurrent readers.
+
+Fills a throwaway database with documents and pages, then for --seconds
+runs reader threads (load a document and one of its pages, as the reader
+view does) alongside writer threads (progress updates, one commit each).
+Compares the previous engine setup (default journal and pooling) with
+make_engine() (WAL, synchronous=NORMAL, mmap, busy timeout, sized pool).
+
+Pass --url to run the tuned setup against another database instead, e.g.
+a scratch PostgreSQL database; its tables are created and dropped.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.load_db_concurrency [--readers N] [--writers N] [--seconds S] [--url URL]
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.controllers.page_store import build_pages
+from backend.database import make_engine
+
+USER_ID = "bench@example.com"
+DOCUMENTS = 200
+PAGES = 20
+
+
+def fill(engine):
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.User(email=USER_ID, name="bench", password="-"))
+    for document_id in range(1, DOCUMENTS + 1):
+        db.add(models.Document(document_id=document_id, title=f"Document {document_id}", user_id=USER_ID, file_path="-", length=PAGES))
+        db.add_all(build_pages(document_id, [f"Page {p} of document {document_id}. " * 200 for p in range(PAGES)]))
+    db.commit()
+    db.close()
+
+
+def read(db, rng):
+    document_id = rng.randint(1, DOCUMENTS)
+    db.query(models.Document).filter(models.Document.document_id == document_id).one()
+    db.query(models.DocumentPage).filter(
+        models.DocumentPage.document_id == document_id,
+        models.DocumentPage.page_number == rng.randint(1, PAGES),
+    ).one()
+    db.rollback()  # End the read transaction, as closing the request's session would
+
+
+def write(db, rng):
+    document = db.query(models.Document).filter(models.Document.document_id == rng.randint(1, DOCUMENTS)).one()
+    document.progress = rng.randint(1, PAGES)
+    db.commit()
+
+
+def run_load(engine, readers: int, writers: int, seconds: float):
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    stop = threading.Event()
+    results = {"read": [], "write": [], "errors": 0}
+    lock = threading.Lock()
+
+    def worker(operation, kind, seed):
+        rng = random.Random(seed)
+        timings, errors = [], 0
+        while not stop.is_set():
+            db = Session()
+            start = time.perf_counter()
+            try:
+                operation(db, rng)
+                timings.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                errors += 1  # "database is locked"
+                db.rollback()
+            finally:
+                db.close()
+        with lock:
+            results[kind].extend(timings)
+            results["errors"] += errors
+
+    threads = [threading.Thread(target=worker, args=(read, "read", i)) for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=(write, "write", 1000 + i)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def report(name, results, seconds):
+    for kind in ("read", "write"):
+        timings = sorted(results[kind])
+        if not timings:
+            print(f"{name:>8} {kind:>6} {0:>9} {'-':>8} {'-':>8}")
+            continue
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        print(f"{name:>8} {kind:>6} {len(timings) / seconds:>9.0f} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+    print(f"{name:>8} {'errors':>6} {results['errors']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--url", help="Database to test instead of temporary SQLite files")
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g} s per setup")
+    print(f"{'setup':>8} {'op':>6} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    if args.url:
+        engine = make_engine(args.url)
+        try:
+            fill(engine)
+            report("tuned", run_load(engine, args.readers, args.writers, args.seconds), args.seconds)
+        finally:
+            models.Base.metadata.drop_all(engine)
+            engine.dispose()
+        return
+
+    out_dir = Path(tempfile.mkdtemp(prefix="astra_bench_"))
+    try:
+        setups = {
+            # How backend/database.py created its engine before
+            "default": lambda url: create_engine(url, connect_args={"check_same_thread": False}),
+            "tuned": make_engine,
+        }
+        for name, setup in setups.items():
+            engine = setup(f"sqlite:///{out_dir / f'{name}.db'}")
+            fill(engine)
+            report(name, run_load(engine, args.readers, args.writers, args.seconds), args.seconds)
+            engine.dispose()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Concurrency load test for the upload path.
+
+Fires concurrent uploads at /documents/upload while a set of readers polls
+/documents/{user_id}, then prints latency percentiles for the reads. Run it
+against a live server, before and after a change, with the same arguments.
+
+Usage (from the repository root, with the API running):
+    python -m backend.benchmarks.load_upload_latency --user someone@example.com [--uploads 20] [--readers 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+import httpx
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def upload(client, path: Path, user: str, latencies):
+    start = time.perf_counter()
+    with path.open("rb") as f:
+        response = await client.post(
+            "/documents/upload",
+            files={"file": (path.name, f, "application/pdf")},
+            data={"user_id": user},
+        )
+    latencies.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response.json()["document_id"]
+
+
+async def reader(client, user: str, stop: asyncio.Event, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(f"/documents/{user}")
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def run(args):
+    files = [Path(p) for p in args.files] or sorted(Path("uploads").glob("*.pdf"))
+    read_latencies, upload_latencies = [], []
+    stop = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300) as client:
+        readers = [asyncio.create_task(reader(client, args.user, stop, read_latencies)) for _ in range(args.readers)]
+        start = time.perf_counter()
+        document_ids = await asyncio.gather(*[
+            upload(client, files[i % len(files)], args.user, upload_latencies) for i in range(args.uploads)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*readers)
+
+        if args.cleanup:
+            for document_id in document_ids:
+                await client.delete(f"/documents/delete/{document_id}")
+
+    print(f"{args.uploads} uploads in {elapsed:.1f} s with {args.readers} concurrent readers")
+    for name, samples in (("GET /documents", read_latencies), ("POST upload", upload_latencies)):
+        ms = [s * 1000 for s in samples]
+        print(f"{name:>15}: n={len(ms)} p50={statistics.median(ms):.0f} ms "
+              f"p95={percentile(ms, 95):.0f} ms p99={percentile(ms, 99):.0f} ms max={max(ms):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Files to upload (default: PDFs in uploads/)")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user", required=True, help="user_id the uploads are made for")
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the uploaded documents afterwards")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import wave
+from pathlib import Path
+
+# Serialises manifest updates made from the synthesis callback
+_manifest_lock = threading.Lock()
+
+# On disk, manifest pages are 0-based page_nums (as synthesized); the API
+# reports 1-based page numbers like Document.progress, via api_page()
+
+
+def api_page(page_num: int) -> int:
+    """1-based page number of a 0-based manifest page_num."""
+    return page_num + 1
+
+
+def manifest_path(audio_file_path: str) -> Path:
+    return Path(f"{audio_file_path}.manifest.json")
+
+
+def segment_path(audio_file_path: str, page_num: int) -> str:
+    return f"{audio_file_path}_page_{page_num}.wav"
+
+
+def _write(audio_file_path: str, manifest: dict):
+    """Write the manifest atomically so readers never see a partial file."""
+    path = manifest_path(audio_file_path)
+    # Per process and thread: a worker that lost its lease may still be writing too
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(audio_file_path: str):
+    path = manifest_path(audio_file_path)
+    if not path.exists():
+        return None
+    with path.open() as f:
+        return json.load(f)
+
+
+def start_manifest(audio_file_path: str, page_nums):
+    """
+    Create the manifest listing every page that will be synthesized.
+
+    If a manifest for the same pages is already on disk (an interrupted run),
+    it is picked up instead and only segments whose files still exist are
+    kept, so generation resumes from the first missing page.
+    """
+    page_nums = list(page_nums)
+    with _manifest_lock:
+        manifest = load_manifest(audio_file_path)
+        if manifest and manifest["pages"] == page_nums and manifest["status"] != "completed":
+            segment_dir = Path(audio_file_path).parent
+            manifest["segments"] = {
+                page_num: segment
+                for page_num, segment in manifest["segments"].items()
+                if (segment_dir / segment["file"]).exists()
+            }
+            manifest["status"] = "in_progress"
+            manifest["file"] = None
+        else:
+            manifest = {
+                "status": "in_progress",
+                "pages": page_nums,
+                "segments": {},
+                "file": None,
+                "duration": 0.0,
+            }
+        _write(audio_file_path, manifest)
+    return manifest
+
+
+def completed_pages(manifest: dict):
+    return {int(page_num) for page_num in manifest["segments"]}
+
+
+def add_segment(audio_file_path: str, page_num: int, page_audio_path: str):
+    """Publish a finished page so it can be played before the book is done."""
+    with wave.open(page_audio_path, "rb") as page:
+        duration = page.getnframes() / page.getframerate()
+
+    with _manifest_lock:
+        manifest = load_manifest(audio_file_path)
+        manifest["segments"][str(page_num)] = {
+            "file": Path(page_audio_path).name,
+            "duration": duration,
+        }
+        _write(audio_file_path, manifest)
+
+
+def complete_manifest(audio_file_path: str, duration: float):
+    """
+    Point every page at its offset in the finished book.
+
+    The per-page WAV segments are deleted once the book is encoded, so from
+    here on a page is played from the book file, starting at `start` seconds.
+    """
+    with _manifest_lock:
+        manifest = load_manifest(audio_file_path)
+        start = 0.0
+        for page_num in manifest["pages"]:
+            segment = manifest["segments"][str(page_num)]
+            segment["file"] = Path(audio_file_path).name
+            segment["start"] = start
+            start += segment["duration"]
+        manifest["status"] = "completed"
+        manifest["file"] = Path(audio_file_path).name
+        manifest["duration"] = duration
+        _write(audio_file_path, manifest)
+
+
+def ready_ranges(manifest: dict):
+    """
+    Group the finished pages into [first_page, last_page] ranges of
+    1-based page numbers.
+
+    Pages are walked in document order, so a range only breaks where a page
+    that is still being synthesized sits between two finished ones.
+    """
+    ranges = []
+    current = None
+    for page_num in manifest["pages"]:
+        if str(page_num) in manifest["segments"]:
+            if current is None:
+                current = [api_page(page_num), api_page(page_num)]
+                ranges.append(current)
+            else:
+                current[1] = api_page(page_num)
+        else:
+            current = None
+    return ranges
@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import os
+import uuid
+from pathlib import Path
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from backend.models import Blob, Document
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path("uploads")
+BLOB_DIR = UPLOAD_DIR / "blobs"
+TMP_DIR = UPLOAD_DIR / "tmp"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def temp_path(suffix: str = "") -> Path:
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    return TMP_DIR / f"{uuid.uuid4().hex}{suffix}"
+
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+async def write_temp(upload, suffix: str = ""):
+    """
+    Stream an UploadFile to a temp file, hashing it on the way.
+
+    Reads and writes happen in 1 MB chunks off the event loop.
+    Returns (temp path, sha256 hex digest, size in bytes).
+    """
+    path = temp_path(suffix)
+    digest = hashlib.sha256()
+    size = 0
+    with path.open("wb") as buffer:
+        while chunk := await upload.read(CHUNK_SIZE):
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+            size += len(chunk)
+    return path, digest.hexdigest(), size
+
+
+def find_blob(db: Session, content_hash: str):
+    return db.query(Blob).filter(Blob.content_hash == content_hash).first()
+
+
+def acquire_blob(db: Session, content_hash: str):
+    """
+    Take a reference on an existing blob. Returns the blob, or None if it is not stored yet.
+
+    The increment is not committed: commit it together with the document
+    that holds the reference, so a failed insert does not leak a reference.
+    """
+    updated = db.query(Blob).filter(Blob.content_hash == content_hash).update(
+        {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False
+    )
+    return find_blob(db, content_hash) if updated else None
+
+
+def add_blob(db: Session, tmp_path: Path, content_hash: str, ext: str) -> Blob:
+    """
+    Store `tmp_path` as the blob for `content_hash` and take a reference on it.
+
+    If another upload stored the same content first, the temp file is
+    discarded and the existing blob is shared instead.
+    """
+    blob = acquire_blob(db, content_hash)
+    if blob:
+        db.commit()
+        tmp_path.unlink(missing_ok=True)
+        return blob
+
+    BLOB_DIR.mkdir(parents=True, exist_ok=True)
+    blob_path = BLOB_DIR / f"{content_hash}.{ext}"
+    size = tmp_path.stat().st_size
+    os.replace(tmp_path, blob_path)
+
+    blob = Blob(content_hash=content_hash, file_path=str(blob_path), size=size, ref_count=1)
+    db.add(blob)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost the race with a concurrent upload of the same content
+        db.rollback()
+        blob = acquire_blob(db, content_hash)
+        db.commit()
+    db.refresh(blob)
+    return blob
+
+
+def release_blob(db: Session, content_hash: str):
+    """
+    Drop a reference on a blob, deleting the file once nothing points at it.
+
+    The row is only deleted by a conditional DELETE (ref_count <= 0), so a
+    concurrent acquire_blob either takes its reference first (and the blob
+    stays) or finds no row and stores the content again. The file is moved
+    aside before the commit, so it can't remove a copy an upload stored
+    again right after it, and is put back if the commit fails.
+    """
+    db.query(Blob).filter(Blob.content_hash == content_hash).update(
+        {Blob.ref_count: Blob.ref_count - 1}, synchronize_session=False
+    )
+    file_path = db.query(Blob.file_path).filter(Blob.content_hash == content_hash).scalar()
+    deleted = db.query(Blob).filter(Blob.content_hash == content_hash, Blob.ref_count <= 0).delete(
+        synchronize_session=False
+    )
+
+    trash = None
+    if deleted and file_path and Path(file_path).exists():
+        trash = temp_path(".deleted")
+        os.replace(file_path, trash)
+    try:
+        db.commit()
+    except Exception:
+        if trash:
+            os.replace(trash, file_path)
+        raise
+    if trash:
+        logger.info(f"Deleting unreferenced blob {file_path}")
+        trash.unlink()
+
+
+def reconcile_blobs(db: Session):
+    """
+    Reset every ref_count to the number of documents using the blob, and
+    delete blobs nothing uses.
+
+    Fixes references leaked by uploads that were interrupted between
+    storing their blob and recording it on the document. Only safe while
+    no upload is in flight (see recover_uploads).
+    """
+    refs = dict(
+        db.query(Document.content_hash, func.count(Document.document_id))
+        .filter(Document.content_hash.isnot(None))
+        .group_by(Document.content_hash)
+        .all()
+    )
+    unused = []
+    for blob in db.query(Blob).all():
+        blob.ref_count = refs.get(blob.content_hash, 0)
+        if blob.ref_count == 0:
+            unused.append(blob)
+    for blob in unused:
+        db.delete(blob)
+    db.commit()
+
+    for blob in unused:
+        Path(blob.file_path).unlink(missing_ok=True)
+    if unused:
+        logger.info(f"Deleted {len(unused)} unreferenced blob(s)")
@@ -0,0 +1,35 @@
+import logging
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+from backend import models
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the schema metadata.create_all() built before migrations
+BASELINE_REVISION = "0001"
+
+
+def upgrade_database(engine):
+    """
+    Bring the database schema up to date (alembic upgrade head).
+
+    A new database is created from the models and stamped as current. One
+    created by metadata.create_all() before there were migrations has no
+    version yet: it is stamped as the baseline, then upgraded like any other.
+    """
+    config = Config(str(ALEMBIC_INI))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        if MigrationContext.configure(connection).get_current_revision() is None:
+            if not inspect(connection).has_table("documents"):
+                models.Base.metadata.create_all(connection)
+                command.stamp(config, "head")
+                logger.info("Created the database schema")
+                return
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import os
+from backend.controllers.llm_client import get_llm
+from backend.controllers.response_cache import response_cache
+
+# Token budget of one prompt's text, for both section and combining prompts
+# (override with SUMMARY_CHUNK_TOKENS)
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 8000))
+
+# Rough English average; only used to size chunks, so it needn't be exact
+CHARS_PER_TOKEN = 4
+
+MAP_PROMPT = "Summarize this section of a longer document in one or two paragraphs, keeping names, figures and conclusions: "
+REDUCE_PROMPT = "Combine these summaries of consecutive sections of a document into one coherent summary: "
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_long(text: str, max_chars: int):
+    """Split text longer than one chunk at line breaks (or hard, if a line is too long)."""
+    piece = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if piece:
+                yield piece
+                piece = ""
+            yield line[:max_chars]
+            line = line[max_chars:]
+        if len(piece) + len(line) > max_chars:
+            yield piece
+            piece = ""
+        piece += line
+    if piece.strip():
+        yield piece
+
+
+def chunk_pages(texts, budget: int = SUMMARY_CHUNK_TOKENS):
+    """
+    Group consecutive page texts into chunks of at most `budget` tokens.
+
+    Besides the budget, a chunk also ends after any page whose content hash
+    is a multiple of the target pages per chunk. Boundaries therefore
+    depend on the pages themselves rather than on everything before them,
+    so a change to one page alters only its own chunk (and the chunk
+    after it at most) and the other chunk summaries are reused from cache.
+    """
+    texts = [text.strip() for text in texts if text and text.strip()]
+    if not texts:
+        return []
+    max_chars = budget * CHARS_PER_TOKEN
+    average = sum(estimate_tokens(text) for text in texts) / len(texts)
+    # Aim for half-full chunks on average; a power of two so small edits don't change it
+    pages_per_chunk = 1
+    while pages_per_chunk * 2 * average <= budget / 2:
+        pages_per_chunk *= 2
+
+    chunks, current = [], ""
+    for text in texts:
+        if len(text) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_long(text, max_chars))
+            continue
+        if current and len(current) + len(text) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{text}" if current else text
+        if int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16) % pages_per_chunk == 0:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def group_summaries(summaries, budget: int = SUMMARY_CHUNK_TOKENS):
+    """Pack consecutive summaries into groups that fit the budget, at least two per group."""
+    max_chars = budget * CHARS_PER_TOKEN
+    groups, current = [], []
+    for summary in summaries:
+        size = sum(len(s) + 2 for s in current) + len(summary)
+        if len(current) >= 2 and size > max_chars:
+            groups.append(current)
+            current = []
+        current.append(summary)
+    if current:
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])  # Never carry a lone summary up a level unchanged
+        else:
+            groups.append(current)
+    return groups
+
+
+async def _summarize(endpoint: str, prompt: str, text: str) -> str:
+    llm = get_llm()
+    return await response_cache.get_or_generate(endpoint, text, llm.config, lambda: llm.generate(f"{prompt}{text}"))
+
+
+async def final_prompt(texts, budget: int = SUMMARY_CHUNK_TOKENS):
+    """
+    Run the map-reduce summary of page texts up to its last prompt.
+
+    Chunks are summarized concurrently (LLM_CONCURRENCY bounds how many
+    run at once), then the summaries are combined in budget-sized groups,
+    level by level, until one group is left. Every prompt goes through the
+    response cache, so only chunks whose text changed are sent again.
+
+    Returns the last prompt, unsent, as a dict of endpoint (cache
+    namespace), prompt and text, plus the chunk and level counts. Returns
+    None without text.
+    """
+    chunks = chunk_pages(texts, budget)
+    if not chunks:
+        return None
+    if len(chunks) == 1:
+        return {"endpoint": "summary-map", "prompt": MAP_PROMPT, "text": chunks[0], "chunks": 1, "levels": 1}
+
+    summaries = await asyncio.gather(*(_summarize("summary-map", MAP_PROMPT, chunk) for chunk in chunks))
+    levels = 2
+    groups = group_summaries(summaries, budget)
+    while len(groups) > 1:
+        summaries = await asyncio.gather(*(
+            _summarize("summary-reduce", REDUCE_PROMPT, "\n\n".join(group)) for group in groups
+        ))
+        groups = group_summaries(summaries, budget)
+        levels += 1
+    return {"endpoint": "summary-reduce", "prompt": REDUCE_PROMPT, "text": "\n\n".join(groups[0]),
+            "chunks": len(chunks), "levels": levels}
+
+
+async def summarize_texts(texts, budget: int = SUMMARY_CHUNK_TOKENS) -> dict:
+    """Map-reduce summary of page texts; see final_prompt."""
+    plan = await final_prompt(texts, budget)
+    if plan is None:
+        return {"summary": "", "chunks": 0, "levels": 0}
+    summary = await _summarize(plan["endpoint"], plan["prompt"], plan["text"])
+    return {"summary": summary, "chunks": plan["chunks"], "levels": plan["levels"]}
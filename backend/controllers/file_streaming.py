@@ -0,0 +1,162 @@
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+import anyio
+from fastapi import HTTPException
+from starlette.responses import Response
+
+# Bytes per read when the server cannot hand the file to sendfile()
+CHUNK_SIZE = 256 * 1024
+
+# Content-addressed files never change, so clients may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else is cached but revalidated with the ETag (a cheap 304)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+mimetypes.add_type("audio/ogg", ".opus")
+mimetypes.add_type("audio/mp4", ".m4a")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class RangeFileResponse(Response):
+    """
+    Send `count` bytes of a file starting at `offset`.
+
+    Uses the ASGI zero-copy extension (sendfile) when the server offers it,
+    otherwise reads the file in CHUNK_SIZE pieces off the event loop.
+    """
+
+    def __init__(self, path: Path, status_code: int, headers: dict, media_type: str,
+                 offset: int = 0, count: int = 0, send_body: bool = True):
+        self.path = path
+        self.status_code = status_code
+        self.media_type = media_type
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+        self.background = None
+        self.init_headers({**headers, "content-length": str(count)})
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file.wrapped,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+                return
+
+            await file.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break  # File shrank underneath us
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match value against our ETag."""
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(headers, etag: str, mtime: float) -> bool:
+    if "if-none-match" in headers:
+        return _etag_matches(headers["if-none-match"], etag)
+    if "if-modified-since" in headers:
+        try:
+            return int(mtime) <= parsedate_to_datetime(headers["if-modified-since"]).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(header: str, size: int):
+    """
+    Parse a single "bytes=start-end" range into inclusive (start, end).
+
+    Returns None when the header should be ignored (malformed, or several
+    ranges, which are served as a plain 200). Raises RangeNotSatisfiable if
+    the range lies outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def file_response(request, path: Path, immutable: bool = False) -> Response:
+    """
+    Serve a file with byte ranges, ETag/Last-Modified validators and 304s.
+
+    Pass `immutable=True` for files named by their content hash; they get a
+    long-lived Cache-Control and the hash as their ETag.
+    """
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = f'"{path.stem}"' if immutable else f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    last_modified = formatdate(st.st_mtime, usegmt=True)
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "accept-ranges": "bytes",
+        "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    if _not_modified(request.headers, etag, st.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    send_body = request.method != "HEAD"
+    size = st.st_size
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A Range is only honoured if the client's copy is still current (If-Range).
+    # If-Range takes one tag and compares strongly, so a W/ tag never matches.
+    if range_header and (if_range is None or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            return RangeFileResponse(path, 206, headers, media_type, start, end - start + 1, send_body)
+
+    return RangeFileResponse(path, 200, headers, media_type, 0, size, send_body)
@@ -0,0 +1,248 @@
+from datetime import datetime, timedelta
+import os
+from sqlalchemy import func, or_, and_, update
+from sqlalchemy.orm import Session
+from backend.models import AudiobookJob, AudioBook
+
+# How long a claimed job stays owned by a worker without a heartbeat (seconds)
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 120))
+
+# Retry backoff: JOB_BACKOFF_SECONDS * 2^(attempt - 1), capped at JOB_BACKOFF_MAX_SECONDS
+JOB_BACKOFF_SECONDS = int(os.getenv("JOB_BACKOFF_SECONDS", 30))
+JOB_BACKOFF_MAX_SECONDS = int(os.getenv("JOB_BACKOFF_MAX_SECONDS", 1800))
+
+# Minimum priority of a job a listener is waiting on (on-demand page requests)
+ON_DEMAND_PRIORITY = int(os.getenv("ON_DEMAND_PRIORITY", 10))
+
+
+def enqueue_job(db: Session, audiobook, bitrate: str = None, priority: int = 0, focus_page: int = None) -> AudiobookJob:
+    """Queue an audiobook for generation by a worker, starting at `focus_page` (1-based) if given."""
+    job = AudiobookJob(
+        audiobook_id=audiobook.audiobook_id,
+        user_id=audiobook.user_id,
+        status="queued",
+        priority=priority,
+        bitrate=bitrate,
+        focus_page=focus_page,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def retry_job(db: Session, job: AudiobookJob, priority: int = None) -> AudiobookJob:
+    """Put a failed job back in the queue with a fresh attempt budget."""
+    job.status = "queued"
+    job.attempts = 0
+    job.run_after = None
+    job.error = None
+    job.finished_at = None
+    if priority is not None:
+        job.priority = priority
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def set_focus(db: Session, job: AudiobookJob, page: int, priority: int = None):
+    """Move a queued or running job's focus to `page` (1-based); the worker picks it up within seconds."""
+    job.focus_page = page
+    if priority is not None:
+        job.priority = max(job.priority or 0, priority)
+    db.commit()
+
+
+def _point_jobs(db: Session, document_id: int, page: int):
+    audiobook_ids = db.query(AudioBook.audiobook_id).filter(AudioBook.document_id == document_id)
+    db.query(AudiobookJob).filter(
+        AudiobookJob.audiobook_id.in_(audiobook_ids),
+        AudiobookJob.status.in_(("queued", "running")),
+    ).update({AudiobookJob.focus_page: page}, synchronize_session=False)
+
+
+def follow_reader(db: Session, document_id: int, page: int):
+    """Point every unfinished audiobook job of a document at the page being read."""
+    _point_jobs(db, document_id, page)
+    db.commit()
+
+
+def follow_readers(db: Session, pages: dict):
+    """follow_reader for several documents ({document_id: page}) in one transaction."""
+    for document_id, page in pages.items():
+        _point_jobs(db, document_id, page)
+    db.commit()
+
+
+def job_focus(db: Session, job_id: int):
+    return db.query(AudiobookJob.focus_page).filter(AudiobookJob.job_id == job_id).scalar()
+
+
+def _claimable(now: datetime):
+    """Queued jobs past their backoff."""
+    return and_(
+        AudiobookJob.status == "queued",
+        or_(AudiobookJob.run_after.is_(None), AudiobookJob.run_after <= now),
+    )
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), JOB_BACKOFF_MAX_SECONDS))
+
+
+def expire_leases(db: Session, now: datetime):
+    """
+    Count a running job whose worker stopped heartbeating as a failed attempt.
+
+    A job that kills its worker (OOM, segfault) never reaches fail_job, so
+    this is where it is backed off, and failed once out of attempts, instead
+    of being picked up again forever.
+    """
+    expired = (
+        db.query(AudiobookJob.job_id, AudiobookJob.attempts, AudiobookJob.max_attempts)
+        .filter(AudiobookJob.status == "running", AudiobookJob.lease_expires_at < now)
+        .all()
+    )
+    for job_id, attempts, max_attempts in expired:
+        values = {"lease_owner": None, "lease_expires_at": None, "error": "Worker stopped responding (crashed or killed)"}
+        if attempts >= max_attempts:
+            values.update(status="failed", finished_at=now)
+        else:
+            values.update(status="queued", run_after=now + _backoff(attempts))
+        # Conditional, so two workers expiring the same lease only count it once
+        db.execute(
+            update(AudiobookJob)
+            .where(AudiobookJob.job_id == job_id, AudiobookJob.status == "running", AudiobookJob.lease_expires_at < now)
+            .values(**values)
+        )
+    if expired:
+        db.commit()
+
+
+def claim_job(db: Session, worker_id: str):
+    """
+    Claim the next job for `worker_id` and lease it for JOB_LEASE_SECONDS.
+
+    Users with the fewest running jobs go first (fair share), then higher
+    priority, then oldest. The claim is a conditional UPDATE, so when two
+    workers race for the same row only one of them gets it. Expired leases
+    are settled first (see expire_leases).
+    """
+    now = datetime.utcnow()
+    expire_leases(db, now)
+
+    running_per_user = (
+        db.query(AudiobookJob.user_id, func.count(AudiobookJob.job_id).label("running"))
+        .filter(AudiobookJob.status == "running", AudiobookJob.lease_expires_at >= now)
+        .group_by(AudiobookJob.user_id)
+        .subquery()
+    )
+    candidates = (
+        db.query(AudiobookJob.job_id)
+        .outerjoin(running_per_user, running_per_user.c.user_id == AudiobookJob.user_id)
+        .filter(_claimable(now))
+        .order_by(
+            func.coalesce(running_per_user.c.running, 0).asc(),
+            AudiobookJob.priority.desc(),
+            AudiobookJob.created_at.asc(),
+        )
+        .limit(5)
+        .all()
+    )
+
+    for (job_id,) in candidates:
+        result = db.execute(
+            update(AudiobookJob)
+            .where(AudiobookJob.job_id == job_id, _claimable(now))
+            .values(
+                status="running",
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                attempts=AudiobookJob.attempts + 1,
+            )
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.query(AudiobookJob).filter(AudiobookJob.job_id == job_id).first()
+    return None
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str, pages_done: int = None, total_pages: int = None,
+              cache_hits: int = None, cache_misses: int = None) -> bool:
+    """Extend the lease and record progress. Returns False if the lease was lost."""
+    values = {"lease_expires_at": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}
+    progress = {
+        "pages_done": pages_done,
+        "total_pages": total_pages,
+        "cache_hits": cache_hits,
+        "cache_misses": cache_misses,
+    }
+    values.update({key: value for key, value in progress.items() if value is not None})
+
+    result = db.execute(
+        update(AudiobookJob)
+        .where(
+            AudiobookJob.job_id == job_id,
+            AudiobookJob.lease_owner == worker_id,
+            AudiobookJob.status == "running",
+        )
+        .values(**values)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def complete_job(db: Session, job: AudiobookJob, worker_id: str) -> bool:
+    """
+    Mark the job completed, committing the session's other changes with it,
+    if `worker_id` still holds the lease. Returns False, and rolls back, if
+    another worker has taken the job over since.
+    """
+    result = db.execute(
+        update(AudiobookJob)
+        .where(
+            AudiobookJob.job_id == job.job_id,
+            AudiobookJob.lease_owner == worker_id,
+            AudiobookJob.status == "running",
+        )
+        .values(status="completed", lease_owner=None, lease_expires_at=None, error=None, finished_at=datetime.utcnow())
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        return False
+    db.commit()
+    return True
+
+
+def fail_job(db: Session, job: AudiobookJob, error: str):
+    """Requeue the job with exponential backoff, or mark it failed once out of attempts."""
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.error = error
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        job.finished_at = datetime.utcnow()
+    else:
+        job.status = "queued"
+        job.run_after = datetime.utcnow() + _backoff(job.attempts)
+    db.commit()
+
+
+def job_status(job: AudiobookJob) -> dict:
+    """Describe a job for the status endpoint."""
+    status = {
+        "status": job.status,
+        "pages_done": job.pages_done,
+        "total_pages": job.total_pages,
+        "attempts": job.attempts,
+        "cache_hits": job.cache_hits,
+        "cache_misses": job.cache_misses,
+        "focus_page": job.focus_page,
+    }
+    if job.status == "running" and job.total_pages:
+        status["detail"] = f"page {job.pages_done} of {job.total_pages}"
+    if job.status == "queued" and job.run_after:
+        status["retry_at"] = job.run_after.isoformat()
+    if job.error:
+        status["error"] = job.error
+    return status
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import re
+import threading
+
+# Which backend answers prompts: "gemini", or "local" for a canned stand-in
+# used by tests and benchmarks (no network, no API key)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+# Prompts in flight at once across all requests (override with LLM_CONCURRENCY)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 4))
+
+# Seconds to wait for an answer, or for the next streamed piece of one
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+
+# Simulated latency of the local backend, in seconds
+LLM_LOCAL_DELAY = float(os.getenv("LLM_LOCAL_DELAY", 0))
+
+# Required by the gemini backend; never commit a key
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+generation_config = {
+    "temperature": 1,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+    "response_mime_type": "text/plain",
+}
+
+
+class LLMTimeout(Exception):
+    pass
+
+
+class LLMUnavailable(Exception):
+    """The configured backend cannot be built (no API key, or its SDK is not installed)."""
+
+
+class GeminiBackend:
+    """Gemini through the SDK's async API."""
+
+    def __init__(self, model_name: str = GEMINI_MODEL):
+        if not GEMINI_API_KEY:
+            raise LLMUnavailable("GEMINI_API_KEY is not set; set it, or use LLM_BACKEND=local")
+        try:
+            import google.generativeai as genai  # Only needed when Gemini is the backend
+        except ImportError:
+            raise LLMUnavailable("The gemini backend needs google-generativeai; install it, or use LLM_BACKEND=local")
+
+        genai.configure(api_key=GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+        self.config = {"backend": "gemini", "model": model_name, **generation_config}
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str):
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class LocalBackend:
+    """
+    Offline stand-in that answers with the first sentences of the prompt.
+
+    Deterministic, so cached and uncached answers can be compared; the
+    optional delay makes it usable for latency and concurrency benchmarks.
+    """
+
+    config = {"backend": "local"}
+
+    def __init__(self, delay: float = LLM_LOCAL_DELAY, sentences: int = 3):
+        self.delay = delay
+        self.sentences = sentences
+
+    def _answer(self, prompt: str) -> str:
+        return " ".join(re.split(r"(?<=[.!?])\s+", prompt.strip())[: self.sentences])
+
+    async def generate(self, prompt: str) -> str:
+        await asyncio.sleep(self.delay)
+        return self._answer(prompt)
+
+    async def stream(self, prompt: str):
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.delay / len(words))
+            yield word if i == 0 else f" {word}"
+
+
+BACKENDS = {"gemini": GeminiBackend, "local": LocalBackend}
+
+
+class LLMClient:
+    """
+    Async front for an LLM backend with a concurrency limit and timeouts.
+
+    At most `concurrency` prompts are sent at once; further callers wait
+    for a slot without blocking the event loop. A call that takes longer
+    than `timeout` (for streams: between two pieces) raises LLMTimeout.
+    """
+
+    def __init__(self, backend, concurrency: int = LLM_CONCURRENCY, timeout: float = LLM_TIMEOUT_SECONDS):
+        self.backend = backend
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(concurrency)
+
+    @property
+    def config(self) -> dict:
+        """Identifies the backend and its settings; part of every response cache key."""
+        return self.backend.config
+
+    async def generate(self, prompt: str) -> str:
+        async with self._slots:
+            try:
+                return await asyncio.wait_for(self.backend.generate(prompt), self.timeout)
+            except asyncio.TimeoutError:
+                raise LLMTimeout(f"No answer within {self.timeout:g} seconds")
+
+    async def stream(self, prompt: str):
+        async with self._slots:
+            pieces = self.backend.stream(prompt).__aiter__()
+            try:
+                while True:
+                    try:
+                        yield await asyncio.wait_for(pieces.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise LLMTimeout(f"Stream stalled for {self.timeout:g} seconds")
+            finally:
+                await pieces.aclose()
+
+
+def create_client(backend: str = LLM_BACKEND) -> LLMClient:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return LLMClient(BACKENDS[backend]())
+
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> LLMClient:
+    """
+    The shared client, built on first use.
+
+    Importing the summary code then needs neither the backend's SDK nor its
+    key; a missing one raises LLMUnavailable from the first request instead.
+    """
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = create_client()
+        return _llm
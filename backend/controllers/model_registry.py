@@ -0,0 +1,101 @@
+from collections import OrderedDict
+import logging
+import os
+import threading
+from TTS.api import TTS
+from backend.controllers.seedvoice import DEFAULT_VOICES
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for loaded models in MB (override with TTS_MODEL_CACHE_MB)
+TTS_MODEL_CACHE_MB = int(os.getenv("TTS_MODEL_CACHE_MB", 2048))
+
+# Comma separated voice ids or model names to load at startup, e.g. "1,2"
+TTS_PRELOAD_VOICES = os.getenv("TTS_PRELOAD_VOICES", "")
+
+
+def _model_size_bytes(tts: TTS) -> int:
+    """Estimate the RAM held by a loaded model from its torch parameters."""
+    size = 0
+    synthesizer = getattr(tts, "synthesizer", None)
+    for name in ("tts_model", "vocoder_model"):
+        module = getattr(synthesizer, name, None)
+        if module is None:
+            continue
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            size += tensor.numel() * tensor.element_size()
+    return size
+
+
+class ModelRegistry:
+    """Process-wide LRU cache of Coqui models keyed by voice name."""
+
+    def __init__(self, budget_mb: int = TTS_MODEL_CACHE_MB):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self._models = OrderedDict()  # voice -> (tts, size in bytes)
+        self._lock = threading.Lock()
+        self._load_locks = {}  # voice -> lock so each voice is loaded only once
+
+    def get(self, voice: str) -> TTS:
+        """Return the model for `voice`, loading it on first use."""
+        with self._lock:
+            if voice in self._models:
+                self._models.move_to_end(voice)
+                return self._models[voice][0]
+            load_lock = self._load_locks.setdefault(voice, threading.Lock())
+
+        # Load outside the registry lock so other voices are not blocked
+        with load_lock:
+            with self._lock:
+                if voice in self._models:
+                    self._models.move_to_end(voice)
+                    return self._models[voice][0]
+
+            logger.info(f"Loading TTS model: {voice}")
+            tts = TTS(model_name=voice)
+            size = _model_size_bytes(tts)
+
+            with self._lock:
+                self._models[voice] = (tts, size)
+                self._evict()
+            logger.info(f"Loaded TTS model {voice} ({size / 1024 / 1024:.0f} MB)")
+            return tts
+
+    def _evict(self):
+        """Drop least recently used models until the budget is met, keeping at least one."""
+        while len(self._models) > 1 and self.memory_bytes() > self.budget_bytes:
+            voice, _ = self._models.popitem(last=False)
+            logger.info(f"Evicted TTS model: {voice}")
+
+    def memory_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def loaded_voices(self):
+        with self._lock:
+            return list(self._models)
+
+
+registry = ModelRegistry()
+
+
+def get_model(voice: str) -> TTS:
+    return registry.get(voice)
+
+
+def preload_voices(voices: str = TTS_PRELOAD_VOICES):
+    """Load the configured hot voices in a background thread."""
+    voice_names = {str(v["voice_id"]): v["voice"] for v in DEFAULT_VOICES}
+    wanted = [voice_names.get(v.strip(), v.strip()) for v in voices.split(",") if v.strip()]
+    if not wanted:
+        return None
+
+    def _load():
+        for voice in wanted:
+            try:
+                registry.get(voice)
+            except Exception as e:
+                logger.error(f"Error preloading TTS model {voice}: {e}", exc_info=True)
+
+    thread = threading.Thread(target=_load, name="tts-preload", daemon=True)
+    thread.start()
+    return thread
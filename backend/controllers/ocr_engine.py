@@ -0,0 +1,142 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import threading
+import fitz  # PyMuPDF
+import pytesseract  # OCR for images
+from PIL import Image  # For image processing
+
+logger = logging.getLogger(__name__)
+
+# Processes used for OCR and PDF generation (override with OCR_WORKERS)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+
+# Resolution scanned pages are rasterized at before OCR
+OCR_DPI = int(os.getenv("OCR_DPI", 300))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # One Tesseract thread per process; the pool provides the parallelism
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                # Forking the multi-threaded API process can deadlock a child; spawn as tts_engine does
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def discard_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose child died (BrokenProcessPool) so the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _ocr_pdf_page(pdf_path: str, page_num: int, dpi: int):
+    """
+    Rasterize one PDF page and OCR it into a searchable PDF page.
+
+    Tesseract's PDF renderer emits the page image with an invisible text
+    layer on top in one pass. Runs in the process pool.
+    """
+    with fitz.open(pdf_path) as pdf:
+        pix = pdf[page_num].get_pixmap(dpi=dpi)
+    image = Image.frombytes("RGB" if pix.n < 4 else "RGBA", (pix.width, pix.height), pix.samples)
+    return page_num, pytesseract.image_to_pdf_or_hocr(image, extension="pdf", config=f"--dpi {dpi}")
+
+
+def _ocr_image(index: int, image_path: str):
+    """OCR one image file into a searchable one-page PDF. Runs in the process pool."""
+    return index, pytesseract.image_to_pdf_or_hocr(Image.open(image_path), extension="pdf")
+
+
+def _submit_all(pool, tasks):
+    futures = [pool.submit(*task) for task in tasks]
+    return dict(future.result() for future in as_completed(futures))
+
+
+def _run(pool, tasks):
+    """
+    Run `tasks` on `pool`, or on the shared pool when it is None.
+
+    A crashed child breaks a ProcessPoolExecutor for good; the shared pool
+    is then replaced and the batch retried once on the new one.
+    """
+    if pool is not None:
+        return _submit_all(pool, tasks)
+    for attempt in (1, 2):
+        pool = get_pool()
+        try:
+            return _submit_all(pool, tasks)
+        except BrokenProcessPool:
+            discard_pool(pool)
+            if attempt == 2:
+                raise
+            logger.warning("An OCR worker died; restarting the pool and retrying the batch")
+
+
+def page_texts(pdf_path: str):
+    """Read the text layer of every page."""
+    with fitz.open(pdf_path) as pdf:
+        return [page.get_text() for page in pdf]
+
+
+def make_searchable_pdf(pdf_path: str, output_path: str, dpi: int = OCR_DPI, pool=None):
+    """
+    OCR the pages of a PDF that have no text layer (scans).
+
+    If there are any, a copy is written to `output_path` where those pages are
+    replaced by searchable ones; pages that already have text are copied as
+    they are, so the page count matches the source. Returns the OCR'd page
+    numbers (0-based); nothing is written when the list is empty.
+    """
+    texts = page_texts(pdf_path)
+    ocr_page_nums = [page_num for page_num, text in enumerate(texts) if not text.strip()]
+    if not ocr_page_nums:
+        return []
+
+    ocr_pages = _run(pool, [(_ocr_pdf_page, pdf_path, page_num, dpi) for page_num in ocr_page_nums])
+
+    with fitz.open(pdf_path) as source, fitz.open() as output:
+        for page_num in range(source.page_count):
+            if page_num in ocr_pages:
+                with fitz.open("pdf", ocr_pages[page_num]) as ocr_page:
+                    output.insert_pdf(ocr_page)
+            else:
+                output.insert_pdf(source, from_page=page_num, to_page=page_num)
+        output.save(output_path, garbage=3, deflate=True)
+    return ocr_page_nums
+
+
+def images_to_searchable_pdf(image_paths, output_path: str, pool=None):
+    """OCR a batch of images across the process pool into one searchable PDF, one page per image."""
+    ocr_pages = _run(pool, [(_ocr_image, index, str(path)) for index, path in enumerate(image_paths)])
+
+    with fitz.open() as output:
+        for index in range(len(image_paths)):
+            with fitz.open("pdf", ocr_pages[index]) as ocr_page:
+                output.insert_pdf(ocr_page)
+        output.save(output_path, garbage=3, deflate=True)
@@ -0,0 +1,98 @@
+import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from backend.models import Document, DocumentPage
+from backend.controllers.ocr_engine import page_texts
+from backend.controllers.text_normalizer import sanitize_pages
+
+logger = logging.getLogger(__name__)
+
+
+def build_pages(document_id: int, texts, ocr_page_nums=()):
+    """Build DocumentPage rows (raw and sanitized text, word counts, offsets) from page texts."""
+    ocr_page_nums = set(ocr_page_nums)
+    sanitized = sanitize_pages(texts)  # Whole document in one pass
+    pages = []
+    offset = 0
+    for page_num, text in enumerate(texts):
+        pages.append(DocumentPage(
+            document_id=document_id,
+            page_number=page_num + 1,
+            raw_text=text,
+            sanitized_text=sanitized[page_num],
+            word_count=len(text.split()),
+            char_start=offset,
+            char_end=offset + len(text),
+            is_ocr=page_num in ocr_page_nums,
+        ))
+        offset += len(text)
+    return pages
+
+
+def store_pages(db: Session, document_id: int, texts, ocr_page_nums=()):
+    """Replace the stored per-page text of a document."""
+    db.query(DocumentPage).filter(DocumentPage.document_id == document_id).delete()
+    db.add_all(build_pages(document_id, texts, ocr_page_nums))
+
+
+def copy_pages(db: Session, content_hash: str, document_id: int):
+    """Copy page text from another document with the same content. Returns that document, or None if there is none."""
+    source = (
+        db.query(Document)
+        .join(DocumentPage, DocumentPage.document_id == Document.document_id)
+        .filter(Document.content_hash == content_hash, Document.document_id != document_id)
+        .first()
+    )
+    if not source:
+        return None
+    columns = ("page_number", "raw_text", "sanitized_text", "word_count", "char_start", "char_end", "is_ocr")
+    pages = db.query(DocumentPage).filter(DocumentPage.document_id == source.document_id).all()
+    db.add_all([
+        DocumentPage(document_id=document_id, **{column: getattr(p, column) for column in columns})
+        for p in pages
+    ])
+    return source
+
+
+def get_pages(db: Session, document: Document, start: int = None, end: int = None):
+    """
+    Return the stored pages of a document in order, optionally limited to [start, end] (1-based).
+
+    Documents uploaded before the page store existed are extracted once and
+    stored on first access.
+    """
+    if document.status != "ready":
+        return []  # Still being processed; pages are stored when it finishes
+
+    query = db.query(DocumentPage).filter(DocumentPage.document_id == document.document_id)
+    if not db.query(query.exists()).scalar():
+        logger.info(f"Indexing pages of document {document.document_id}")
+        store_pages(db, document.document_id, page_texts(document.file_path))
+        db.commit()
+
+    if start is not None:
+        query = query.filter(DocumentPage.page_number >= start)
+    if end is not None:
+        query = query.filter(DocumentPage.page_number <= end)
+    return query.order_by(DocumentPage.page_number).all()
+
+
+async def get_pages_async(db: AsyncSession, document: Document, start: int = None, end: int = None):
+    """get_pages for an AsyncSession; a legacy document's text is extracted off the event loop."""
+    if document.status != "ready":
+        return []
+
+    query = select(DocumentPage).where(DocumentPage.document_id == document.document_id)
+    if not await db.scalar(select(query.exists())):
+        logger.info(f"Indexing pages of document {document.document_id}")
+        texts = await run_in_threadpool(page_texts, document.file_path)
+        await db.run_sync(store_pages, document.document_id, texts)
+        await db.commit()
+
+    if start is not None:
+        query = query.where(DocumentPage.page_number >= start)
+    if end is not None:
+        query = query.where(DocumentPage.page_number <= end)
+    return (await db.scalars(query.order_by(DocumentPage.page_number))).all()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+from sqlalchemy import bindparam, update
+from backend.database import AsyncSessionLocal
+from backend.models import Document
+from backend.controllers.job_queue import follow_readers
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of buffered reading progress (override with PROGRESS_FLUSH_SECONDS)
+PROGRESS_FLUSH_SECONDS = float(os.getenv("PROGRESS_FLUSH_SECONDS", 5))
+
+_set_progress = (
+    update(Document.__table__)
+    .where(Document.__table__.c.document_id == bindparam("document"))
+    .values(progress=bindparam("page"))
+)
+
+
+class ProgressBuffer:
+    """
+    Latest reading progress per document, written to the database in batches.
+
+    Page turns only replace the buffered value; every `interval` seconds (and
+    at shutdown) all of them are written in one transaction, which also
+    points unfinished audiobook jobs at the pages being read. Each server
+    process has its own buffer, so reads must go through `get` to see
+    progress that has not been flushed yet.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, interval: float = PROGRESS_FLUSH_SECONDS):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.updates = 0
+        self.flushes = 0
+        self._pending = {}  # document_id -> page (1-based)
+        self._task = None
+
+    def record(self, document_id: int, page: int):
+        self._pending[document_id] = page
+        self.updates += 1
+
+    def get(self, document_id: int, default=None):
+        """Buffered progress of a document, or `default` if nothing is waiting to be written."""
+        return self._pending.get(document_id, default)
+
+    def discard(self, document_id: int):
+        """Forget a document's pending progress (it is being deleted)."""
+        self._pending.pop(document_id, None)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with self.session_factory() as db:
+                await db.execute(_set_progress, [{"document": d, "page": p} for d, p in pending.items()])
+                await db.run_sync(follow_readers, pending)  # Commits both
+            self.flushes += 1
+        except Exception:
+            logger.exception(f"Failed to write progress of {len(pending)} documents; retrying next flush")
+            self._requeue(pending)
+        except BaseException:
+            self._requeue(pending)  # Cancelled mid-write; stop() writes it again
+            raise
+
+    def _requeue(self, pending: dict):
+        for document_id, page in pending.items():
+            self._pending.setdefault(document_id, page)  # Newer page turns win
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+progress_buffer = ProgressBuffer()
@@ -0,0 +1,11 @@
+import os
+from pathlib import Path
+
+# Address clients reach the API on; file URLs in responses are built from it
+# (override with PUBLIC_BASE_URL, e.g. https://astra.example.com)
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+
+
+def public_url(path) -> str:
+    """Absolute URL of a served file, given its path relative to the repository root."""
+    return f"{PUBLIC_BASE_URL}/{Path(path).as_posix()}"
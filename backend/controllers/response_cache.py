@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+
+# Generated answers live here, one JSON file per (endpoint, text, config) hash
+RESPONSE_CACHE_DIR = Path(os.getenv("RESPONSE_CACHE_DIR", "uploads/.llm_cache"))
+
+# How long an answer is reused, in seconds (override with RESPONSE_CACHE_TTL, 0 disables the cache)
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 7 * 24 * 3600))
+
+# Entries kept on disk and in memory (override with RESPONSE_CACHE_ENTRIES / RESPONSE_CACHE_MEMORY_ENTRIES)
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", 20000))
+RESPONSE_CACHE_MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", 1000))
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _whitespace.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """
+    Cache of generated text keyed by (endpoint, normalized input, generation config).
+
+    Recent entries are held in an in-memory LRU; every entry is also written
+    to disk so answers survive restarts. A disk hit bumps the file's mtime
+    and eviction removes the oldest files first, as in SynthesisCache.
+    Entries older than the TTL are treated as misses.
+
+    Concurrent requests for the same key share one upstream call.
+    """
+
+    def __init__(self, cache_dir: Path = RESPONSE_CACHE_DIR, ttl: int = RESPONSE_CACHE_TTL,
+                 max_entries: int = RESPONSE_CACHE_ENTRIES, memory_entries: int = RESPONSE_CACHE_MEMORY_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._memory = OrderedDict()  # key -> (created, text)
+        self._count = None  # Approximate entries on disk, counted on first store
+        self._in_flight = {}  # key -> task shared by concurrent identical requests
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def key(self, endpoint: str, text: str, config: dict) -> str:
+        payload = json.dumps([endpoint, normalize_text(text), config], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _fresh(self, created: float) -> bool:
+        return time.time() - created < self.ttl
+
+    def _remember(self, key: str, created: float, text: str):
+        with self._lock:
+            self._memory[key] = (created, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def lookup(self, key: str):
+        """Return the cached text for the key, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and self._fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        path = self.path_for(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if not self._fresh(entry["created"]):
+                path.unlink(missing_ok=True)
+                return None
+            os.utime(path)  # Mark as recently used
+        except (FileNotFoundError, ValueError, KeyError):
+            return None  # Missing, evicted meanwhile or half-written
+        self._remember(key, entry["created"], entry["text"])
+        with self._lock:
+            self.hits += 1
+        return entry["text"]
+
+    def store(self, key: str, text: str):
+        created = time.time()
+        self._remember(key, created, text)
+
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.part")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created": created, "text": text}, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.misses += 1
+            if self._count is None:
+                self._count = len(self._entries())
+            else:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _entries(self):
+        return list(self.cache_dir.glob("*/*.json"))
+
+    def _evict(self):
+        """Delete expired entries, then least recently used ones until back under 90% of the limit."""
+        entries = []
+        for p in self._entries():
+            try:
+                entries.append((p.stat().st_mtime, p))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+
+        keep = int(self.max_entries * 0.9)
+        expired_before = time.time() - self.ttl
+        count = len(entries)
+        for mtime, p in entries:
+            if count <= keep and mtime >= expired_before:
+                break
+            p.unlink(missing_ok=True)
+            self._memory.pop(p.stem, None)
+            count -= 1
+        self._count = count
+
+    async def _fetch(self, key: str, generate):
+        text = await run_in_threadpool(self.lookup, key)
+        if text is None:
+            text = await generate()
+            await run_in_threadpool(self.store, key, text)
+        return text
+
+    async def get_or_generate(self, endpoint: str, text: str, config: dict, generate):
+        """
+        Return the cached answer for this input, awaiting `generate()` on a miss.
+
+        `generate` is a coroutine function returning the generated text.
+        Failures are not cached and are raised to every request waiting on
+        the same key.
+        """
+        if not self.enabled:
+            return await generate()
+
+        key = self.key(endpoint, text, config)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and self._fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            # A task of its own, so a disconnecting client doesn't cancel the call others wait on
+            task = asyncio.ensure_future(self._fetch(key, generate))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries()) if self.cache_dir.exists() else 0,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+response_cache = ResponseCache()
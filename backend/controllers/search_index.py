@@ -0,0 +1,235 @@
+import html
+import logging
+import re
+from sqlalchemy import and_, func, literal, null, or_, select, text, union_all
+from sqlalchemy.orm import Session
+from backend.models import Bookmark, Document, DocumentPage, Note
+
+logger = logging.getLogger(__name__)
+
+# Every indexed row gets a stable FTS rowid derived from its source row, so
+# the triggers below can update or delete it by rowid instead of scanning:
+#   page      (document_id * 2^20 + page_number) * 4
+#   note      note_id * 4 + 1
+#   bookmark  bookmark_id * 4 + 2
+PAGE_ROWID = "(({0}.document_id * 1048576 + {0}.page_number) * 4)"
+NOTE_ROWID = "({0}.note_id * 4 + 1)"
+BOOKMARK_ROWID = "({0}.bookmark_id * 4 + 2)"
+
+KINDS = ("page", "note", "bookmark")
+
+# No porter stemming: match_query's prefix term is matched against the indexed
+# tokens as typed, and a stemmed index has no "elephant" for "elepha*" to find
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE search_index USING fts5(
+    title, body,
+    kind UNINDEXED, ref_id UNINDEXED, document_id UNINDEXED, page UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+COLUMNS = "rowid, title, body, kind, ref_id, document_id, page"
+
+# Values of COLUMNS for a source row, with `{0}` standing for the row (new/old in triggers)
+PAGE_VALUES = PAGE_ROWID + ", '', {0}.raw_text, 'page', NULL, {0}.document_id, {0}.page_number"
+NOTE_VALUES = NOTE_ROWID + ", {0}.note_title, {0}.content, 'note', {0}.note_id, {0}.document_id, {0}.page"
+BOOKMARK_VALUES = BOOKMARK_ROWID + ", '', coalesce({0}.description, ''), 'bookmark', {0}.bookmark_id, {0}.document_id, {0}.page_number"
+
+INSERT_PAGE = f"INSERT INTO search_index({COLUMNS}) VALUES ({PAGE_VALUES.format('new')});"
+INSERT_NOTE = f"INSERT INTO search_index({COLUMNS}) VALUES ({NOTE_VALUES.format('new')});"
+INSERT_BOOKMARK = f"INSERT INTO search_index({COLUMNS}) VALUES ({BOOKMARK_VALUES.format('new')});"
+DELETE_PAGE = f"DELETE FROM search_index WHERE rowid = {PAGE_ROWID.format('old')};"
+DELETE_NOTE = f"DELETE FROM search_index WHERE rowid = {NOTE_ROWID.format('old')};"
+DELETE_BOOKMARK = f"DELETE FROM search_index WHERE rowid = {BOOKMARK_ROWID.format('old')};"
+
+# Keep the index in step with every write, whichever code path makes it
+# (routers, the upload pipeline, ORM cascades, bulk deletes)
+TRIGGERS = {
+    "search_page_insert": ("AFTER INSERT ON document_pages", INSERT_PAGE),
+    "search_page_delete": ("AFTER DELETE ON document_pages", DELETE_PAGE),
+    "search_page_update": ("AFTER UPDATE ON document_pages", DELETE_PAGE + INSERT_PAGE),
+    "search_note_insert": ("AFTER INSERT ON notes", INSERT_NOTE),
+    "search_note_delete": ("AFTER DELETE ON notes", DELETE_NOTE),
+    "search_note_update": ("AFTER UPDATE ON notes", DELETE_NOTE + INSERT_NOTE),
+    "search_bookmark_insert": ("AFTER INSERT ON bookmarks", INSERT_BOOKMARK),
+    "search_bookmark_delete": ("AFTER DELETE ON bookmarks", DELETE_BOOKMARK),
+    "search_bookmark_update": ("AFTER UPDATE ON bookmarks", DELETE_BOOKMARK + INSERT_BOOKMARK),
+}
+
+BACKFILL = (
+    f"INSERT INTO search_index({COLUMNS}) SELECT {PAGE_VALUES.format('p')} FROM document_pages AS p",
+    f"INSERT INTO search_index({COLUMNS}) SELECT {NOTE_VALUES.format('n')} FROM notes AS n",
+    f"INSERT INTO search_index({COLUMNS}) SELECT {BOOKMARK_VALUES.format('b')} FROM bookmarks AS b",
+)
+
+
+def create_search_index(engine):
+    """
+    Create the FTS5 index and its triggers if they don't exist yet.
+
+    A freshly created index is filled from the existing pages, notes and
+    bookmarks; after that the triggers keep it up to date row by row. An
+    index created with a different definition (e.g. the old porter
+    tokenizer) is dropped and rebuilt the same way.
+    """
+    if engine.dialect.name != "sqlite":
+        logger.warning("Full-text search needs SQLite FTS5; /search falls back to unranked LIKE matching")
+        return
+
+    with engine.begin() as conn:
+        existing = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+        ).scalar()
+        if existing is not None and existing.split() != CREATE_TABLE.split():
+            conn.execute(text("DROP TABLE search_index"))
+            existing = None
+        if existing is None:
+            conn.execute(text(CREATE_TABLE))
+            for statement in BACKFILL:
+                conn.execute(text(statement))
+            logger.info("Built the full-text search index")
+
+        for name, (event, body) in TRIGGERS.items():
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END"))
+
+
+def match_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query.
+
+    Every word must match (quoted, so FTS syntax in user input is literal);
+    the last word also matches as a prefix so results show up while typing.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# snippet() marks matches with these control characters, which can't occur
+# in \w+ terms, so the text around them can be escaped before adding <mark>
+MARK_START, MARK_END = "\x02", "\x03"
+
+
+def _mark(snippet: str) -> str:
+    """HTML-escape a snippet and turn its match markers into <mark> tags."""
+    return html.escape(snippet or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def search(db: Session, user_id: str, query: str, kind: str = None, limit: int = 20, offset: int = 0):
+    """
+    Ranked full-text search over a user's pages, notes and bookmarks.
+
+    Returns (total matches, hits); hits carry the document and page to open
+    and an HTML-escaped snippet with the matching terms wrapped in <mark>
+    (the only markup in it). Other databases
+    have no FTS5 index and use search_like.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return search_like(db, user_id, query, kind, limit, offset)
+
+    match = match_query(query)
+    if not match:
+        return 0, []
+
+    where = "search_index MATCH :match AND d.user_id = :user_id"
+    params = {"match": match, "user_id": user_id, "limit": limit, "offset": offset}
+    if kind:
+        where += " AND s.kind = :kind"
+        params["kind"] = kind
+
+    total = db.execute(
+        text(f"SELECT count(*) FROM search_index AS s JOIN documents AS d ON d.document_id = s.document_id WHERE {where}"),
+        params,
+    ).scalar()
+    if not total:
+        return 0, []
+
+    # bm25 weights: a hit in a note title counts more than one in the body
+    rows = db.execute(
+        text(
+            "SELECT s.kind, s.ref_id, s.document_id, d.title AS document_title, s.page, s.title, "
+            "snippet(search_index, -1, :mark_start, :mark_end, '…', 16) AS snippet, "
+            "bm25(search_index, 5.0, 1.0) AS score "
+            "FROM search_index AS s JOIN documents AS d ON d.document_id = s.document_id "
+            f"WHERE {where} ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {**params, "mark_start": MARK_START, "mark_end": MARK_END},
+    ).mappings().all()
+    return total, [{**row, "snippet": _mark(row["snippet"])} for row in rows]
+
+
+SNIPPET_WORDS = 16
+
+
+def _like_snippet(body: str, terms) -> str:
+    """About SNIPPET_WORDS words around the first matching term, HTML-escaped, matches wrapped in <mark>."""
+    words = body.split()
+    lowered = [word.lower() for word in words]
+    first = next((i for i, word in enumerate(lowered) if any(term in word for term in terms)), 0)
+    start = max(0, first - SNIPPET_WORDS // 2)
+    excerpt = " ".join(words[start:start + SNIPPET_WORDS])
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    excerpt = pattern.sub(lambda m: f"{MARK_START}{m.group(0)}{MARK_END}", excerpt)
+    return _mark(("…" if start > 0 else "") + excerpt + ("…" if start + SNIPPET_WORDS < len(words) else ""))
+
+
+def search_like(db: Session, user_id: str, query: str, kind: str = None, limit: int = 20, offset: int = 0):
+    """
+    search() for databases without FTS5 (PostgreSQL): every word must occur
+    (case-insensitive substring) in the title or body. No index and no
+    ranking: hits come in document and page order, with score None.
+    """
+    terms = [term.lower() for term in re.findall(r"\w+", query)]
+    if not terms:
+        return 0, []
+
+    sources = {
+        "page": select(
+            literal("page").label("kind"), null().label("ref_id"), DocumentPage.document_id.label("document_id"),
+            DocumentPage.page_number.label("page"), literal("").label("title"), DocumentPage.raw_text.label("body"),
+        ),
+        "note": select(
+            literal("note").label("kind"), Note.note_id.label("ref_id"), Note.document_id.label("document_id"),
+            Note.page.label("page"), Note.note_title.label("title"), Note.content.label("body"),
+        ),
+        "bookmark": select(
+            literal("bookmark").label("kind"), Bookmark.bookmark_id.label("ref_id"), Bookmark.document_id.label("document_id"),
+            Bookmark.page_number.label("page"), literal("").label("title"), func.coalesce(Bookmark.description, "").label("body"),
+        ),
+    }
+    rows = union_all(*(source for name, source in sources.items() if not kind or name == kind)).subquery()
+
+    # \w+ terms can only carry the LIKE wildcard "_"; escape it
+    patterns = ["%" + term.replace("_", "\\_") + "%" for term in terms]
+    matches = and_(*(
+        or_(rows.c.title.ilike(pattern, escape="\\"), rows.c.body.ilike(pattern, escape="\\"))
+        for pattern in patterns
+    ))
+    hits = (
+        select(rows, Document.title.label("document_title"))
+        .join(Document, Document.document_id == rows.c.document_id)
+        .where(Document.user_id == user_id, matches)
+    )
+
+    total = db.execute(select(func.count()).select_from(hits.subquery())).scalar()
+    if not total:
+        return 0, []
+    found = db.execute(
+        hits.order_by(rows.c.document_id, rows.c.page, rows.c.kind, rows.c.ref_id).limit(limit).offset(offset)
+    ).mappings().all()
+    return total, [
+        {
+            "kind": row["kind"],
+            "ref_id": row["ref_id"],
+            "document_id": row["document_id"],
+            "document_title": row["document_title"],
+            "page": row["page"],
+            "title": row["title"],
+            "snippet": _like_snippet(row["body"] or row["title"], terms),
+            "score": None,
+        }
+        for row in found
+    ]
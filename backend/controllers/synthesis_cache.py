@@ -0,0 +1,127 @@
+import hashlib
+import os
+import re
+import threading
+import wave
+from pathlib import Path
+from backend.controllers.text_normalizer import split_sentences
+
+# Synthesized chunks live here, one WAV per (normalized text, voice) hash
+SYNTHESIS_CACHE_DIR = Path(os.getenv("SYNTHESIS_CACHE_DIR", "audiobooks/.tts_cache"))
+
+# Size budget in MB (override with SYNTHESIS_CACHE_MB, 0 disables the cache)
+SYNTHESIS_CACHE_MB = int(os.getenv("SYNTHESIS_CACHE_MB", 2048))
+
+# Part of every key; bump it when the stored audio changes so old entries are
+# never mixed with new ones (2: fixed PCM scale instead of per-chunk peak normalization)
+CACHE_FORMAT = 2
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_chunk(text: str) -> str:
+    return _whitespace.sub(" ", text).strip()
+
+
+def split_chunks(text: str):
+    """Split page text into sentences, the unit that is cached and reused."""
+    return [chunk for chunk in (normalize_chunk(c) for c in split_sentences(text)) if chunk]
+
+
+class SynthesisCache:
+    """
+    On-disk content-addressed cache of synthesized chunks.
+
+    Entries are keyed by sha256(CACHE_FORMAT, voice, normalized text). A hit bumps the
+    file's mtime and eviction removes the oldest files first, which gives
+    LRU order that is shared by every process using the same directory.
+    """
+
+    def __init__(self, cache_dir: Path = SYNTHESIS_CACHE_DIR, budget_mb: int = SYNTHESIS_CACHE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Approximate bytes on disk, counted on first store
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def key(self, text: str, voice: str) -> str:
+        return hashlib.sha256(f"{CACHE_FORMAT}\0{voice}\0{normalize_chunk(text)}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    def lookup(self, text: str, voice: str):
+        """Return the cached WAV path for the chunk, or None on a miss."""
+        path = self.path_for(self.key(text, voice))
+        if path.exists():
+            try:
+                os.utime(path)  # Mark as recently used
+                with self._lock:
+                    self.hits += 1
+                return path
+            except FileNotFoundError:
+                pass  # Evicted between the check and the touch
+        return None
+
+    def store(self, text: str, voice: str, pcm: bytes, framerate: int):
+        """Write a synthesized chunk (16-bit mono PCM) into the cache."""
+        path = self.path_for(self.key(text, voice))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.part.wav")
+        with wave.open(str(tmp_path), "wb") as chunk:
+            chunk.setnchannels(1)
+            chunk.setsampwidth(2)
+            chunk.setframerate(framerate)
+            chunk.writeframes(pcm)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.misses += 1
+            if self._size is None:
+                self._size = self.size_bytes()
+            else:
+                self._size += path.stat().st_size
+            if self._size > self.budget_bytes:
+                self._evict()
+
+    def _entries(self):
+        return [p for p in self.cache_dir.glob("*/*.wav") if not p.name.endswith(".part.wav")]
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self._entries())
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is back under 90% of its budget."""
+        entries = []
+        for p in self._entries():
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        target = self.budget_bytes * 0.9
+        for _, entry_size, p in entries:
+            if size <= target:
+                break
+            p.unlink(missing_ok=True)
+            size -= entry_size
+        self._size = size
+
+    def stats(self) -> dict:
+        entries = self._entries() if self.cache_dir.exists() else []
+        return {
+            "entries": len(entries),
+            "size_mb": round(sum(p.stat().st_size for p in entries) / 1024 / 1024, 1),
+            "budget_mb": round(self.budget_bytes / 1024 / 1024),
+        }
+
+
+synthesis_cache = SynthesisCache()
@@ -0,0 +1,145 @@
+import os
+import re
+import unicodedata
+
+# Keep non-English letters instead of replacing them with spaces (for
+# multilingual voices); set SANITIZE_KEEP_UNICODE=1 to make it the default
+SANITIZE_KEEP_UNICODE = os.getenv("SANITIZE_KEEP_UNICODE", "0") == "1"
+
+# Longest chunk handed to the TTS model; longer sentences are split at commas or spaces
+TTS_MAX_CHUNK_CHARS = int(os.getenv("TTS_MAX_CHUNK_CHARS", 250))
+
+# Pages are joined with this so a whole document is normalized at once
+PAGE_BREAK = "\f"
+
+# Typographic punctuation mapped to the ASCII it stands for before filtering
+_typography = (
+    ("\u2018", "'"), ("\u2019", "'"), ("\u201c", '"'), ("\u201d", '"'),
+    ("\u2013", " "), ("\u2014", " "), ("\u2026", "..."),
+)
+
+# Layout fixes. Each pattern starts on a literal so the regex engine can
+# skip straight from one candidate line break to the next.
+# A word broken across lines ("exam-\nple") is rejoined
+_hyphen_break = re.compile(r"-[ \t]*\n[^\S\f]*(?=\w)")
+# A blank line ends a sentence; add the period if it is missing
+_paragraph_break = re.compile(r"\n[ \t]*\n")
+# A short line followed by a capitalized line (titles, headings) ends a sentence
+_heading = re.compile(r"(\n[A-Z0-9][^\n\f.!?]{0,48}[^\s.,!?;:])[ \t]*(?=\n[ \t]*[A-Z0-9])")
+
+_combining = re.compile(r"[\u0300-\u036f]+")
+_foreign = re.compile(r"[^\x00-\x7F]+")
+_symbols = re.compile(r"[^\w\s.,!?]+")  # Keep common punctuation
+_camel_case = re.compile(r"([a-z])([A-Z])")  # camelCase to camel Case
+_all_caps = re.compile(r"([A-Z]{2,})([a-z])")  # ALLCAPSto to ALLCAPS to
+
+# Candidate sentence boundaries: terminal punctuation followed by whitespace
+_sentence_end = re.compile(r"[.!?]+\s+")
+
+# Words whose trailing period does not end a sentence (compared lowercased, dots removed)
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "eg", "ie",
+    "fig", "figs", "no", "vol", "pp", "ch", "sec", "inc", "ltd", "co", "dept", "approx",
+}
+
+
+def _char_before(match) -> str:
+    """Last non-blank character before the match on the same page ("" at the page start)."""
+    return match.string[max(match.start() - 8, 0):match.start()].rpartition(PAGE_BREAK)[2].rstrip()[-1:]
+
+
+def _join_hyphenated(match):
+    return "" if _char_before(match).isalnum() else " "
+
+
+def _end_paragraph(match):
+    before = _char_before(match)
+    return " " if not before or before in ".!?,;:" else ". "
+
+
+def _finish_page(text: str) -> str:
+    text = " ".join(text.split())
+    for mark in ".,!?":
+        if f" {mark}" in text:
+            text = text.replace(f" {mark}", mark)  # Left behind by removed symbols
+    if text and text[-1] not in ".!?":
+        text += "."  # End every page on a sentence boundary
+    return text
+
+
+def sanitize_pages(texts, keep_unicode: bool = None):
+    """
+    Normalize a batch of page texts for TTS.
+
+    The pages are joined and run through each precompiled pattern once, so
+    a whole document costs one scan per pattern rather than seven per page.
+    Symbols are dropped and whitespace collapsed. Line-broken words are
+    rejoined, and paragraphs and headings end with a period. By default
+    anything non-ASCII becomes a space (accents are folded first, so "café"
+    reads "cafe"); with `keep_unicode` letters of every script are kept.
+    Blank pages come back as "".
+    """
+    if keep_unicode is None:
+        keep_unicode = SANITIZE_KEEP_UNICODE
+
+    # The leading line break lets a heading on the first line match
+    text = PAGE_BREAK.join("\n" + t.replace(PAGE_BREAK, "\n") for t in texts)
+    if not text.isascii():
+        for char, replacement in _typography:
+            if char in text:
+                text = text.replace(char, replacement)
+        if keep_unicode:
+            text = unicodedata.normalize("NFC", text)
+        elif not text.isascii():
+            # Decompose accented letters so the base letter survives the ASCII filter
+            text = _combining.sub("", unicodedata.normalize("NFKD", text))
+            text = _foreign.sub(" ", text)
+
+    text = _hyphen_break.sub(_join_hyphenated, text)
+    text = _paragraph_break.sub(_end_paragraph, text)
+    text = _heading.sub(r"\1.", text)
+    text = _symbols.sub("", text)
+    text = _camel_case.sub(r"\1 \2", text)
+    text = _all_caps.sub(r"\1 \2", text)
+    return [_finish_page(page) for page in text.split(PAGE_BREAK)]
+
+
+def sanitize_text(input_text, keep_unicode: bool = None):
+    """Normalize one page (or a whole document) for TTS; see sanitize_pages."""
+    return sanitize_pages([input_text], keep_unicode)[0]
+
+
+def _wrap(sentence: str, max_chars: int):
+    """Split an over-long sentence, preferring commas, then spaces."""
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(", ", 0, max_chars)
+        if cut >= max_chars // 2:
+            cut += 1  # Keep the comma with the first part
+        else:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+        yield sentence[:cut].strip()
+        sentence = sentence[cut:].strip()
+    if sentence:
+        yield sentence
+
+
+def split_sentences(text: str, max_chars: int = TTS_MAX_CHUNK_CHARS):
+    """
+    Split sanitized text into sentences for TTS chunking.
+
+    Periods after abbreviations ("Dr.", "e.g.") and single initials ("J. K.")
+    don't end a sentence. Sentences longer than `max_chars` are split further.
+    """
+    sentences = []
+    start = 0
+    for match in _sentence_end.finditer(text):
+        if match.group()[0] == "." and match.group().count(".") == 1:
+            word = text[max(start, text.rfind(" ", start, match.start()) + 1):match.start()]
+            if word.replace(".", "").lower() in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                continue
+        sentences.extend(_wrap(text[start:match.end()].strip(), max_chars))
+        start = match.end()
+    sentences.extend(_wrap(text[start:].strip(), max_chars))
+    return sentences
@@ -0,0 +1,102 @@
+import os
+import re
+import subprocess
+import threading
+from pathlib import Path
+from pydub import AudioSegment
+
+# Output format used when a request does not ask for one (override with AUDIOBOOK_FORMAT)
+DEFAULT_AUDIO_FORMAT = os.getenv("AUDIOBOOK_FORMAT", "opus")
+
+# ffmpeg muxer, codec, file extension and default bitrate per output format
+AUDIO_FORMATS = {
+    "opus": {"muxer": "ogg", "codec": "libopus", "ext": "opus", "bitrate": "48k"},
+    "mp3": {"muxer": "mp3", "codec": "libmp3lame", "ext": "mp3", "bitrate": "96k"},
+    "aac": {"muxer": "ipod", "codec": "aac", "ext": "m4a", "bitrate": "96k"},
+    "wav": {"muxer": "wav", "codec": "pcm_s16le", "ext": "wav", "bitrate": None},
+    "flac": {"muxer": "flac", "codec": "flac", "ext": "flac", "bitrate": None},
+}
+
+# Formats that keep every sample; a book in any other format also keeps a
+# FLAC master so its other variants are not re-encoded from lossy audio
+LOSSLESS_FORMATS = ("wav", "flac")
+
+# Bitrates accepted from clients, e.g. "48k"; they end up in ffmpeg arguments and file names
+BITRATE_PATTERN = re.compile(r"^\d{2,3}k$")
+
+# Transcoded variants are stored here and reused for later requests
+TRANSCODE_DIR = Path("audiobooks") / "transcoded"
+
+# One lock per variant so concurrent requests encode it only once
+_variant_locks = {}
+_variant_locks_lock = threading.Lock()
+
+
+def audio_extension(audio_format: str) -> str:
+    return AUDIO_FORMATS[audio_format]["ext"]
+
+
+def valid_bitrate(bitrate: str = None) -> bool:
+    return bitrate is None or BITRATE_PATTERN.match(bitrate) is not None
+
+
+def master_path(audio_file_path: str) -> Path:
+    """Lossless FLAC master kept next to a lossy audiobook."""
+    return Path(f"{audio_file_path}.master.flac")
+
+
+def encode(input_path: str, output_path: str, audio_format: str, bitrate: str = None):
+    """
+    Encode an audio file with ffmpeg.
+
+    ffmpeg streams from disk to disk, so the book is never loaded into memory.
+    The output is written to a temp file first and renamed when complete.
+    """
+    spec = AUDIO_FORMATS[audio_format]
+    if not valid_bitrate(bitrate):
+        raise ValueError(f"Invalid bitrate: {bitrate!r}")
+    bitrate = bitrate or spec["bitrate"]
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.part"  # Never shared by two encodes
+
+    command = [AudioSegment.converter, "-y", "-loglevel", "error", "-i", str(input_path), "-vn", "-c:a", spec["codec"]]
+    if bitrate:
+        command += ["-b:a", bitrate]
+    command += ["-f", spec["muxer"], tmp_path]
+
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg failed: {e.stderr.decode(errors='replace').strip()}") from e
+    os.replace(tmp_path, output_path)
+
+
+def get_variant(source_path: str, audio_format: str, bitrate: str = None) -> Path:
+    """
+    Return the cached transcode of `source_path`, encoding it on first request.
+
+    Variants are encoded from the book's FLAC master when it has one, so a
+    lower bitrate is not a re-encode of already lossy audio.
+    """
+    if not valid_bitrate(bitrate):
+        raise ValueError(f"Invalid bitrate: {bitrate!r}")
+    spec = AUDIO_FORMATS[audio_format]
+    source = Path(source_path)
+    lossless = master_path(source_path)
+
+    # Serving the source as-is when it already matches avoids a lossy re-encode
+    if source.suffix == f".{spec['ext']}" and not bitrate:
+        return source
+    bitrate = bitrate or spec["bitrate"]
+
+    TRANSCODE_DIR.mkdir(parents=True, exist_ok=True)
+    variant = TRANSCODE_DIR / f"{source.stem}_{bitrate or 'pcm'}.{spec['ext']}"
+
+    with _variant_locks_lock:
+        lock = _variant_locks.setdefault(str(variant), threading.Lock())
+    with lock:
+        # Re-encode if the source was regenerated after the variant was made
+        if not variant.exists() or variant.stat().st_mtime < source.stat().st_mtime:
+            encode(str(lossless if lossless.exists() else source), str(variant), audio_format, bitrate)
+    return variant
+
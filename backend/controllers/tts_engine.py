@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+import torch
+from backend.controllers.model_registry import get_model, preload_voices
+from backend.controllers.audiobook_manifest import segment_path
+from backend.controllers.synthesis_cache import synthesis_cache, split_chunks
+from backend.controllers.wav_writer import StreamingWavWriter
+from backend.controllers.tts_inference import synthesize_chunks, sample_rate, to_pcm16
+
+# Number of worker processes used to synthesize pages (override with TTS_WORKERS)
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", os.cpu_count() or 1))
+
+# Worker pools are kept alive between requests so each worker loads a voice
+# only once; keyed by worker count
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _init_worker(torch_threads: int):
+    """Limit torch threads and start loading the TTS_PRELOAD_VOICES models when a worker process starts."""
+    torch.set_num_threads(torch_threads)
+    preload_voices()
+
+
+def _write_page(voice: str, text: str, page_audio_path: str):
+    """
+    Synthesize a page sentence by sentence into a temp file and rename it.
+
+    Sentences already in the synthesis cache are copied; the rest are
+    synthesized together in memory (batched where the model allows) and
+    their PCM goes straight into the page, with no temp file per sentence.
+    The rename means a crash never leaves a half-written page behind.
+    Returns (cache_hits, cache_misses).
+    """
+    model = get_model(voice)
+    framerate = sample_rate(model)
+    chunks = split_chunks(text)
+
+    cached = {}
+    if synthesis_cache.enabled:
+        for index, chunk in enumerate(chunks):
+            path = synthesis_cache.lookup(chunk, voice)
+            if path:
+                cached[index] = path
+
+    missing = [index for index in range(len(chunks)) if index not in cached]
+    pcm = {}
+    for index, waveform in zip(missing, synthesize_chunks(model, [chunks[i] for i in missing])):
+        pcm[index] = to_pcm16(waveform)
+        if synthesis_cache.enabled:
+            synthesis_cache.store(chunks[index], voice, pcm[index], framerate)
+
+    # Per process and thread, so two workers on the same page never share a temp file
+    tmp_path = f"{page_audio_path}.{os.getpid()}.{threading.get_ident()}.part"
+    with StreamingWavWriter(tmp_path) as writer:
+        for index, chunk in enumerate(chunks):
+            if index in cached:
+                try:
+                    writer.append_wav(cached[index])
+                    continue
+                except FileNotFoundError:
+                    # Evicted by another process before we copied it
+                    pcm[index] = to_pcm16(synthesize_chunks(model, [chunk])[0])
+            writer.append_frames(pcm[index], 1, 2, framerate)
+    os.replace(tmp_path, page_audio_path)
+    return len(cached), len(missing)
+
+
+def _synthesize_page(voice: str, page_num: int, text: str, page_audio_path: str):
+    """Synthesize one page inside a worker process."""
+    hits, misses = _write_page(voice, text, page_audio_path)
+    return page_num, page_audio_path, hits, misses
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared worker pool of the given size, starting it on first use."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # Split the cores between workers so torch does not oversubscribe the box
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                # "spawn" keeps torch/OpenMP state from leaking into the children
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(torch_threads,),
+            )
+            _pools[workers] = pool
+        return pool
+
+
+def discard_pool(workers: int, pool: ProcessPoolExecutor):
+    """Drop a pool whose worker died (BrokenProcessPool) so the next job starts a fresh one."""
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+def next_page(pending, focus: int = None) -> int:
+    """
+    Pick the page to synthesize next: the first pending page at or after
+    `focus` (the page being read), wrapping around to the earlier pages.
+    """
+    if focus is not None:
+        ahead = [page_num for page_num in pending if page_num >= focus]
+        if ahead:
+            return min(ahead)
+    return min(pending)
+
+
+def synthesize_pages(pages, audio_file_path: str, voice: str, workers: int = None, on_page_done=None, focus=None):
+    """
+    Synthesize (page_num, text) pairs across a pool of worker processes.
+
+    Each page is written to `{audio_file_path}_page_{page_num}.wav` and the
+    list of page audio paths is returned in page order. `on_page_done` is
+    called with (page_num, page_audio_path, cache_hits, cache_misses) as
+    soon as each page finishes.
+
+    `focus` is an optional callable returning the page_num to prioritize
+    (or None). It is consulted every time a worker frees up, and only one
+    page per worker is in flight, so a reader jumping ahead is served after
+    the pages already being synthesized.
+    """
+    if not pages:
+        return []
+    workers = workers or TTS_WORKERS
+    workers = max(1, min(workers, len(pages)))
+    pending = dict(pages)
+
+    def take_next():
+        page_num = next_page(pending, focus() if focus else None)
+        return page_num, pending.pop(page_num)
+
+    if workers == 1:
+        # No point paying for process start-up on a single page or a single core;
+        # reuse the model shared by every request in this process instead
+        while pending:
+            page_num, text = take_next()
+            page_audio_path = segment_path(audio_file_path, page_num)
+            hits, misses = _write_page(voice, text, page_audio_path)
+            if on_page_done:
+                on_page_done(page_num, page_audio_path, hits, misses)
+        return [segment_path(audio_file_path, page_num) for page_num in sorted(page_num for page_num, _ in pages)]
+
+    pool = get_pool(workers)
+    in_flight = set()
+
+    def submit_next():
+        page_num, text = take_next()
+        in_flight.add(pool.submit(_synthesize_page, voice, page_num, text, segment_path(audio_file_path, page_num)))
+
+    results = {}
+    try:
+        while pending and len(in_flight) < workers:
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight.remove(future)
+                page_num, page_audio_path, hits, misses = future.result()
+                results[page_num] = page_audio_path
+                if on_page_done:
+                    on_page_done(page_num, page_audio_path, hits, misses)
+                if pending:
+                    submit_next()
+    except BrokenProcessPool:
+        # A worker died (OOM, segfault); the job fails and its retry resumes
+        # from the finished pages on a new pool
+        discard_pool(workers, pool)
+        raise
+
+    # Reassemble in page order regardless of completion order
+    return [results[page_num] for page_num in sorted(results)]
@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import torch
+from TTS.tts.utils.synthesis import trim_silence
+
+# Sentence chunks run through the model in one forward pass (override with
+# TTS_BATCH_SIZE; 1 disables batching)
+TTS_BATCH_SIZE = int(os.getenv("TTS_BATCH_SIZE", 8))
+
+# Silence Coqui's Synthesizer appends after every sentence; batched output gets the same gap
+SENTENCE_GAP_SAMPLES = 10000
+
+# Single-speaker models whose inference() accepts a padded batch with x_lengths
+BATCHED_MODELS = ("GlowTTS", "Vits")
+
+
+def sample_rate(model) -> int:
+    return model.synthesizer.output_sample_rate
+
+
+def to_pcm16(waveform: np.ndarray) -> bytes:
+    """
+    Float waveform (nominally -1..1) to 16-bit PCM at a fixed scale.
+
+    Coqui's save_wav peak-normalizes a whole file; done per sentence chunk
+    that would change the loudness from one sentence to the next and boost
+    quiet or short chunks, so samples are only clipped and scaled.
+    """
+    return (np.clip(waveform, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def supports_batching(model) -> bool:
+    synthesizer = model.synthesizer
+    tts_model = synthesizer.tts_model
+    if type(tts_model).__name__ not in BATCHED_MODELS:
+        return False
+    if model.is_multi_speaker or model.is_multi_lingual:
+        return False
+    if type(tts_model).__name__ == "GlowTTS":
+        # Mel output is batched through a neural vocoder running at the model's sample rate
+        return (
+            synthesizer.vocoder_model is not None
+            and synthesizer.vocoder_config.audio["sample_rate"] == tts_model.ap.sample_rate
+        )
+    return True
+
+
+def _finish(synthesizer, waveform: np.ndarray) -> np.ndarray:
+    """Trim and pad one waveform the way Synthesizer.tts does per sentence."""
+    audio_config = synthesizer.tts_config.audio
+    if "do_trim_silence" in audio_config and audio_config["do_trim_silence"]:
+        waveform = trim_silence(waveform, synthesizer.tts_model.ap)
+    return np.concatenate([waveform.astype(np.float32), np.zeros(SENTENCE_GAP_SAMPLES, dtype=np.float32)])
+
+
+def _vocode(synthesizer, mels, mel_lengths):
+    """Run a batch of mel spectrograms ([B, T, C], model-normalized) through the vocoder."""
+    tts_model = synthesizer.tts_model
+    device = next(synthesizer.vocoder_model.parameters()).device
+    inputs = []
+    for mel, length in zip(mels, mel_lengths):
+        mel = tts_model.ap.denormalize(mel[:length].T)  # [C, T]
+        inputs.append(torch.as_tensor(synthesizer.vocoder_ap.normalize(mel), dtype=torch.float32))
+
+    # Pad with the quietest value; the padded tail is cut off again below
+    pad_value = min(float(item.min()) for item in inputs)
+    batch = torch.full((len(inputs), inputs[0].shape[0], max(mel_lengths)), pad_value)
+    for row, mel in enumerate(inputs):
+        batch[row, :, : mel.shape[1]] = mel
+
+    waveforms = synthesizer.vocoder_model.inference(batch.to(device)).squeeze(1).cpu().numpy()
+    hop_length = synthesizer.vocoder_config.audio["hop_length"]
+    return [waveform[: length * hop_length] for waveform, length in zip(waveforms, mel_lengths)]
+
+
+def _infer_batch(model, chunks):
+    synthesizer = model.synthesizer
+    tts_model = synthesizer.tts_model
+    device = next(tts_model.parameters()).device
+
+    token_ids = [tts_model.tokenizer.text_to_ids(chunk) for chunk in chunks]
+    x_lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long, device=device)
+    x = torch.zeros((len(chunks), int(x_lengths.max())), dtype=torch.long, device=device)
+    for row, ids in enumerate(token_ids):
+        x[row, : len(ids)] = torch.as_tensor(ids, dtype=torch.long)
+
+    aux_input = {"x_lengths": x_lengths, "d_vectors": None, "speaker_ids": None, "language_ids": None, "durations": None}
+    with torch.inference_mode():
+        outputs = tts_model.inference(x, aux_input=aux_input)
+        if type(tts_model).__name__ == "Vits":
+            # Waveforms come straight out of the model: [B, 1, T_wav]
+            hop_length = tts_model.config.audio.hop_length
+            lengths = (outputs["y_mask"].sum(dim=(1, 2)) * hop_length).long().tolist()
+            waveforms = outputs["model_outputs"].squeeze(1).cpu().numpy()
+            waveforms = [waveform[:length] for waveform, length in zip(waveforms, lengths)]
+        else:
+            # Mel frames past each item's length have an all-zero alignment row
+            mel_lengths = (outputs["alignments"].sum(dim=2) > 0).sum(dim=1).tolist()
+            waveforms = _vocode(synthesizer, outputs["model_outputs"].cpu().numpy(), mel_lengths)
+    return [_finish(synthesizer, waveform) for waveform in waveforms]
+
+
+def synthesize_chunks(model, chunks, batch_size: int = None):
+    """
+    Synthesize sentence chunks into float32 waveforms, in memory.
+
+    Models that support it get several chunks per forward pass; chunks are
+    grouped by length so little of each batch is padding. Other models (and
+    batch_size 1) go through TTS.tts() one chunk at a time. Each waveform
+    ends with the same pause the Synthesizer puts between sentences.
+    """
+    batch_size = batch_size or TTS_BATCH_SIZE
+    if batch_size <= 1 or len(chunks) <= 1 or not supports_batching(model):
+        return [np.asarray(model.tts(text=chunk, split_sentences=False), dtype=np.float32) for chunk in chunks]
+
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    waveforms = [None] * len(chunks)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        for index, waveform in zip(batch, _infer_batch(model, [chunks[i] for i in batch])):
+            waveforms[index] = waveform
+    return waveforms
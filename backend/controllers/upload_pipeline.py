@@ -0,0 +1,181 @@
+import logging
+from pathlib import Path
+import fitz  # PyMuPDF
+from PIL import Image  # For image processing
+from backend.database import SessionLocal
+from backend.models import Document
+from backend.controllers.blob_store import TMP_DIR, temp_path, add_blob, release_blob, reconcile_blobs
+from backend.controllers.page_store import store_pages, copy_pages
+from backend.controllers.ocr_engine import page_texts, make_searchable_pdf, images_to_searchable_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def verify_image(image_path: str) -> bool:
+    try:
+        Image.open(image_path).verify()
+        return True
+    except Exception:
+        return False
+
+
+def page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as pdf:
+        return pdf.page_count
+
+
+def _finish(db, document_id: int, blob, texts, ocr_page_nums, is_scanned: bool):
+    """Point the document at its blob, store its pages and mark it ready."""
+    document = db.query(Document).filter(Document.document_id == document_id).first()
+    if not document:
+        # Deleted while it was being processed
+        release_blob(db, blob.content_hash)
+        return
+
+    store_pages(db, document_id, texts, ocr_page_nums)
+    document.file_path = blob.file_path
+    document.content_hash = blob.content_hash
+    document.length = len(texts)
+    document.is_scanned = is_scanned
+    document.status = "ready"
+    db.commit()
+    logger.info(f"Document {document_id} processed: {len(texts)} pages, {len(ocr_page_nums)} OCR'd")
+
+
+def _fail(db, document_id: int, blob, paths):
+    db.rollback()
+    for path in paths:
+        if path and Path(path).exists():
+            Path(path).unlink()
+    if blob:
+        release_blob(db, blob.content_hash)
+    document = db.query(Document).filter(Document.document_id == document_id).first()
+    if document:
+        document.status = "failed"
+        db.commit()
+
+
+def process_upload(document_id: int, tmp_path: Path, content_hash: str, file_ext: str):
+    """
+    Turn a streamed upload into a stored blob and mark the document ready.
+
+    Runs after the upload request has returned (FastAPI runs it in its thread
+    pool); OCR is handed to the process pool. Images and scanned PDF pages
+    without a text layer are turned into searchable pages (original image
+    plus invisible OCR text), stored under the hash of the original upload.
+    """
+    db = SessionLocal()
+    pdf_path = None
+    blob = None
+    try:
+        pdf_path = temp_path(".pdf")
+        if file_ext == "pdf":
+            ocr_page_nums = make_searchable_pdf(str(tmp_path), str(pdf_path))
+            source = pdf_path if ocr_page_nums else tmp_path
+        else:
+            images_to_searchable_pdf([tmp_path], str(pdf_path))
+            ocr_page_nums = [0]
+            source = pdf_path
+
+        if source != tmp_path:
+            tmp_path.unlink()
+        blob = add_blob(db, source, content_hash, "pdf")
+
+        texts = page_texts(blob.file_path)
+        _finish(db, document_id, blob, texts, ocr_page_nums, bool(ocr_page_nums))
+
+    except Exception as e:
+        logger.error(f"Error processing document {document_id}: {e}", exc_info=True)
+        _fail(db, document_id, blob, [tmp_path, pdf_path])
+    finally:
+        db.close()
+
+
+def process_image_batch(document_id: int, image_paths, content_hash: str):
+    """Combine several uploaded images into one searchable PDF, OCR'ing them in parallel."""
+    db = SessionLocal()
+    pdf_path = None
+    blob = None
+    try:
+        pdf_path = temp_path(".pdf")
+        images_to_searchable_pdf(image_paths, str(pdf_path))
+        for image_path in image_paths:
+            Path(image_path).unlink()
+
+        blob = add_blob(db, pdf_path, content_hash, "pdf")
+        texts = page_texts(blob.file_path)
+        _finish(db, document_id, blob, texts, range(len(texts)), True)
+
+    except Exception as e:
+        logger.error(f"Error processing document {document_id}: {e}", exc_info=True)
+        _fail(db, document_id, blob, [*image_paths, pdf_path])
+    finally:
+        db.close()
+
+
+def adopt_duplicate(db, document: Document) -> bool:
+    """
+    Give a new upload whose content is already stored (document.content_hash)
+    the pages and OCR flag of a stored copy, in the caller's transaction, so
+    it is complete as soon as it is committed "ready". Returns False if no
+    copy has its pages yet; index_duplicate extracts them then.
+    """
+    db.flush()  # Assigns the document_id
+    source = copy_pages(db, document.content_hash, document.document_id)
+    if source is None:
+        return False
+    document.is_scanned = source.is_scanned
+    return True
+
+
+def index_duplicate(document_id: int, content_hash: str, file_path: str):
+    """Fill in page text for a duplicate upload adopt_duplicate had no pages for, then mark it ready."""
+    db = SessionLocal()
+    try:
+        document = db.query(Document).filter(Document.document_id == document_id).first()
+        if not document:
+            return  # Deleted in the meantime
+        source = copy_pages(db, content_hash, document_id)
+        if source:
+            document.is_scanned = source.is_scanned
+        else:
+            store_pages(db, document_id, page_texts(file_path))
+        document.status = "ready"
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error indexing pages of document {document_id}: {e}", exc_info=True)
+        db.rollback()
+        document = db.query(Document).filter(Document.document_id == document_id).first()
+        if document:
+            document.status = "failed"
+            db.commit()
+    finally:
+        db.close()
+
+
+def recover_uploads():
+    """
+    Settle uploads cut off by a restart or crash.
+
+    Processing runs in this process's background tasks, so after a restart
+    nothing will ever finish a document still marked "processing": it is
+    marked failed (the user can upload it again), the temp files of
+    interrupted uploads are removed and blob references are recounted.
+    Only safe while no API process is running: see backend/recover_uploads.py.
+    """
+    db = SessionLocal()
+    try:
+        stuck = db.query(Document).filter(Document.status == "processing").all()
+        for document in stuck:
+            document.status = "failed"
+        db.commit()
+        if stuck:
+            logger.warning(f"Marked {len(stuck)} interrupted upload(s) as failed")
+
+        if TMP_DIR.exists():
+            for path in TMP_DIR.iterdir():
+                path.unlink(missing_ok=True)
+
+        reconcile_blobs(db)
+    finally:
+        db.close()
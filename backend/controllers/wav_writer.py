@@ -0,0 +1,66 @@
+import wave
+from pydub import AudioSegment
+
+# Frames copied per read when appending a page (~1.5 MB at 22050 Hz / 16 bit mono)
+CHUNK_FRAMES = 65536
+
+
+class StreamingWavWriter:
+    """
+    Append page WAV files straight into one output WAV.
+
+    Only one chunk of PCM is in memory at a time. The RIFF header is written
+    with the parameters of the first page and the frame count is patched when
+    the writer is closed.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = str(output_path)
+        self._wav = None
+        self.nchannels = None
+        self.sampwidth = None
+        self.framerate = None
+        self.frames_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self, nchannels: int, sampwidth: int, framerate: int):
+        self._wav = wave.open(self.output_path, "wb")
+        self._wav.setnchannels(nchannels)
+        self._wav.setsampwidth(sampwidth)
+        self._wav.setframerate(framerate)
+        self.nchannels, self.sampwidth, self.framerate = nchannels, sampwidth, framerate
+
+    def append_frames(self, frames: bytes, nchannels: int, sampwidth: int, framerate: int):
+        """Append raw PCM frames with the given format."""
+        if self._wav is None:
+            self._open(nchannels, sampwidth, framerate)
+        elif (nchannels, sampwidth, framerate) != (self.nchannels, self.sampwidth, self.framerate):
+            # Rare: a page came out in a different format, convert just that buffer
+            segment = AudioSegment(frames, channels=nchannels, sample_width=sampwidth, frame_rate=framerate)
+            segment = segment.set_channels(self.nchannels).set_sample_width(self.sampwidth).set_frame_rate(self.framerate)
+            frames = segment.raw_data
+        self._wav.writeframesraw(frames)
+        self.frames_written += len(frames) // (self.nchannels * self.sampwidth)
+
+    def append_wav(self, wav_path: str):
+        """Copy the PCM frames of a WAV file into the output, one chunk at a time."""
+        with wave.open(str(wav_path), "rb") as page:
+            params = (page.getnchannels(), page.getsampwidth(), page.getframerate())
+            while frames := page.readframes(CHUNK_FRAMES):
+                self.append_frames(frames, *params)
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio written so far."""
+        return self.frames_written / self.framerate if self.framerate else 0.0
+
+    def close(self):
+        # wave patches the RIFF/data sizes in the header on close
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
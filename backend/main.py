@@ -1,11 +1,13 @@
 from fastapi import FastAPI
-from backend import models
 from .database import engine
-from .routers import auth,users,documents, folders,summarization,notes,bookmarks,settings
+from .routers import auth,users,documents, folders,summarization,notes,bookmarks,settings,search
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from backend.controllers.seedvoice import seed_voices
-from .routers import audiobook
+from backend.controllers.ocr_engine import shutdown_pool as shutdown_ocr_pool
+from backend.controllers.search_index import create_search_index
+from backend.controllers.progress_buffer import progress_buffer
+from backend.controllers.db_migrations import upgrade_database
+from .routers import audiobook, files
 import os
 
 app = FastAPI()
@@ -18,13 +20,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-print("Creating tables...")
-models.Base.metadata.create_all(engine)
-print("Tables created successfully!")
+print("Migrating the database...")
+upgrade_database(engine)
+print("Database is up to date!")
+
+# Full-text index over page text, notes and bookmarks (kept current by triggers)
+create_search_index(engine)
 
 # Call the seed function during startup
 seed_voices()
 
+# Uploads cut off by a shutdown are settled by python -m backend.recover_uploads, not
+# here: every API process runs this module, next to the others' in-flight uploads
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -35,6 +42,7 @@ app.include_router(summarization.router)
 app.include_router(notes.router)
 app.include_router(bookmarks.router)
 app.include_router(settings.router)
+app.include_router(search.router)
 
 UPLOAD_DIR = "uploads"
 AUDIOBOOK_DIR = "audiobooks"
@@ -45,8 +53,22 @@ if not os.path.exists("UPLOAD_DIR"):
 if not os.path.exists(AUDIOBOOK_DIR):
     os.mkdir(AUDIOBOOK_DIR)
 
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-app.mount("/audiobooks", StaticFiles(directory=AUDIOBOOK_DIR), name="audiobooks")
+# Serves /uploads and /audiobooks with Range and conditional requests; included
+# last so the /audiobooks API routes above take precedence
+app.include_router(files.router)
+
+@app.on_event("startup")
+async def start_progress_buffer():
+    # Reading progress is buffered in memory and written every PROGRESS_FLUSH_SECONDS
+    progress_buffer.start()
+
+@app.on_event("shutdown")
+async def flush_progress_buffer():
+    await progress_buffer.stop()
+
+@app.on_event("shutdown")
+def stop_workers():
+    shutdown_ocr_pool()
 
 @app.get("/")
 def home():
@@ -0,0 +1,27 @@
+from alembic import context
+from backend import models
+from backend.database import engine
+
+target_metadata = models.Base.metadata
+
+
+def run_migrations_online():
+    # upgrade_database() passes the connection it already holds
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.begin() as connection:
+        _run(connection)
+
+
+def _run(connection):
+    # render_as_batch: SQLite can only change constraints by copying the table
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    raise SystemExit("Offline (--sql) migrations are not supported; run against a database")
+run_migrations_online()
@@ -0,0 +1,154 @@
+"""Baseline: the original schema, as metadata.create_all() built it before migrations
+
+The search_index FTS table is not part of it; create_search_index() manages
+it on SQLite.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('email')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+
+    op.create_table('voices',
+    sa.Column('voice_id', sa.Integer(), nullable=False),
+    sa.Column('voice', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('voice_id')
+    )
+    with op.batch_alter_table('voices', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_voices_voice_id'), ['voice_id'], unique=False)
+
+    op.create_table('folders',
+    sa.Column('folder_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('folder_name', sa.Text(), nullable=False),
+    sa.Column('parent', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['parent'], ['folders.folder_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('folder_id')
+    )
+    with op.batch_alter_table('folders', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_folders_folder_id'), ['folder_id'], unique=False)
+
+    op.create_table('otp',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('code', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('settings',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('speed', sa.Float(), nullable=True),
+    sa.Column('streak_count', sa.Integer(), nullable=True),
+    sa.Column('last_login_date', sa.Date(), nullable=True),
+    sa.Column('page_goal', sa.Integer(), nullable=True),
+    sa.Column('duration_goal', sa.Float(), nullable=True),
+    sa.Column('voice_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.email'], ),
+    sa.ForeignKeyConstraint(['voice_id'], ['voices.voice_id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('documents',
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('is_scanned', sa.Boolean(), nullable=False),
+    sa.Column('title', sa.Text(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('progress', sa.Integer(), nullable=True),
+    sa.Column('folder_id', sa.Integer(), nullable=True),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['folder_id'], ['folders.folder_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('document_id')
+    )
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_documents_document_id'), ['document_id'], unique=False)
+
+    op.create_table('audiobooks',
+    sa.Column('audiobook_id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('voice_id', sa.Integer(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.document_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.email'], ),
+    sa.ForeignKeyConstraint(['voice_id'], ['voices.voice_id'], ),
+    sa.PrimaryKeyConstraint('audiobook_id')
+    )
+    with op.batch_alter_table('audiobooks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_audiobooks_audiobook_id'), ['audiobook_id'], unique=False)
+
+    op.create_table('bookmarks',
+    sa.Column('bookmark_id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.document_id'], ),
+    sa.PrimaryKeyConstraint('bookmark_id')
+    )
+    with op.batch_alter_table('bookmarks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_bookmarks_bookmark_id'), ['bookmark_id'], unique=False)
+
+    op.create_table('notes',
+    sa.Column('note_id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('note_title', sa.Text(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('page', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.document_id'], ),
+    sa.PrimaryKeyConstraint('note_id')
+    )
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_notes_note_id'), ['note_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_notes_note_id'))
+
+    op.drop_table('notes')
+    with op.batch_alter_table('bookmarks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bookmarks_bookmark_id'))
+
+    op.drop_table('bookmarks')
+    with op.batch_alter_table('audiobooks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_audiobooks_audiobook_id'))
+
+    op.drop_table('audiobooks')
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_documents_document_id'))
+
+    op.drop_table('documents')
+    op.drop_table('settings')
+    op.drop_table('otp')
+    with op.batch_alter_table('folders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_folders_folder_id'))
+
+    op.drop_table('folders')
+    with op.batch_alter_table('voices', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_voices_voice_id'))
+
+    op.drop_table('voices')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
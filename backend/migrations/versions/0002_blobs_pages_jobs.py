@@ -0,0 +1,104 @@
+"""Blob store, page store, upload status and the audiobook job queue
+
+Adds the blobs table and documents.content_hash (deduplicated uploads),
+documents.status (background upload processing), document_pages (per-page
+text) and audiobook_jobs (the worker queue). Existing documents become
+"ready" legacy uploads with no blob; their pages are stored on first access.
+
+A database created by metadata.create_all() after some of these were added
+to the models, but before there were migrations, is stamped 0001 like any
+other unversioned one; whatever it already has is left as it is.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    document_columns = {column['name'] for column in inspector.get_columns('documents')}
+
+    if 'blobs' not in tables:
+        op.create_table('blobs',
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash')
+        )
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        if 'content_hash' not in document_columns:
+            batch_op.add_column(sa.Column('content_hash', sa.String(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_documents_content_hash'), ['content_hash'], unique=False)
+            batch_op.create_foreign_key('fk_documents_content_hash_blobs', 'blobs', ['content_hash'], ['content_hash'])
+        if 'status' not in document_columns:
+            batch_op.add_column(sa.Column('status', sa.String(), nullable=False, server_default='ready'))
+
+    if 'document_pages' not in tables:
+        op.create_table('document_pages',
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('page_number', sa.Integer(), nullable=False),
+        sa.Column('raw_text', sa.Text(), nullable=False),
+        sa.Column('sanitized_text', sa.Text(), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=False),
+        sa.Column('char_start', sa.Integer(), nullable=False),
+        sa.Column('char_end', sa.Integer(), nullable=False),
+        sa.Column('is_ocr', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.document_id'], ),
+        sa.PrimaryKeyConstraint('document_id', 'page_number')
+        )
+
+    if 'audiobook_jobs' not in tables:
+        op.create_table('audiobook_jobs',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('audiobook_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('bitrate', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('max_attempts', sa.Integer(), nullable=True),
+        sa.Column('pages_done', sa.Integer(), nullable=True),
+        sa.Column('total_pages', sa.Integer(), nullable=True),
+        sa.Column('focus_page', sa.Integer(), nullable=True),
+        sa.Column('cache_hits', sa.Integer(), nullable=True),
+        sa.Column('cache_misses', sa.Integer(), nullable=True),
+        sa.Column('lease_owner', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('run_after', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['audiobook_id'], ['audiobooks.audiobook_id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.email'], ),
+        sa.PrimaryKeyConstraint('job_id'),
+        sa.UniqueConstraint('audiobook_id')
+        )
+        with op.batch_alter_table('audiobook_jobs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_audiobook_jobs_job_id'), ['job_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audiobook_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_audiobook_jobs_job_id'))
+
+    op.drop_table('audiobook_jobs')
+    op.drop_table('document_pages')
+    # Dropping content_hash drops its foreign key, which create_all() left unnamed
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_documents_content_hash'))
+        batch_op.drop_column('status')
+        batch_op.drop_column('content_hash')
+
+    op.drop_table('blobs')
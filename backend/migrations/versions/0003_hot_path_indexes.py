@@ -0,0 +1,72 @@
+"""Indexes for the hot queries, and one audiobook per document, voice and user
+
+Listing documents (by user or folder), folders, notes, bookmarks and a
+user's audiobooks filtered on unindexed columns, so every request scanned
+the table. generate_audiobook looks audiobooks up by (document, voice,
+user); the unique constraint both indexes that lookup and stops two
+concurrent requests from creating the same audiobook twice.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Audiobooks that repeat an older one's (document, voice, user); the oldest is
+# the one generate_audiobook has been returning
+DUPLICATE_AUDIOBOOKS = """
+SELECT a.audiobook_id FROM audiobooks AS a
+WHERE EXISTS (
+    SELECT 1 FROM audiobooks AS b
+    WHERE b.document_id = a.document_id AND b.voice_id = a.voice_id
+      AND b.user_id = a.user_id AND b.audiobook_id < a.audiobook_id
+)
+"""
+
+
+def upgrade():
+    op.execute(sa.text(f"DELETE FROM audiobook_jobs WHERE audiobook_id IN ({DUPLICATE_AUDIOBOOKS})"))
+    op.execute(sa.text(f"DELETE FROM audiobooks WHERE audiobook_id IN ({DUPLICATE_AUDIOBOOKS})"))
+
+    with op.batch_alter_table('audiobooks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_audiobooks_user_id'), ['user_id'], unique=False)
+        batch_op.create_unique_constraint('uq_audiobooks_document_voice_user', ['document_id', 'voice_id', 'user_id'])
+
+    with op.batch_alter_table('bookmarks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_bookmarks_document_id'), ['document_id'], unique=False)
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_documents_folder_id'), ['folder_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_documents_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('folders', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_folders_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_notes_document_id'), ['document_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_notes_document_id'))
+
+    with op.batch_alter_table('folders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_folders_user_id'))
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_documents_user_id'))
+        batch_op.drop_index(batch_op.f('ix_documents_folder_id'))
+
+    with op.batch_alter_table('bookmarks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bookmarks_document_id'))
+
+    with op.batch_alter_table('audiobooks', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_audiobooks_document_voice_user', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_audiobooks_user_id'))
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, Float, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Boolean, Text, Float, ForeignKey, Date, DateTime, UniqueConstraint
+from datetime import datetime
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -42,25 +43,57 @@ class Document(Base):
     document_id = Column(Integer, primary_key=True, index=True)
     is_scanned = Column(Boolean, nullable=False, default=False)
     title = Column(Text, nullable=False)
-    user_id = Column(String, ForeignKey("users.email"), nullable=False)
+    user_id = Column(String, ForeignKey("users.email"), nullable=False, index=True)
     file_path = Column(String, nullable=False)
     progress = Column(Integer, default=0)  # Default progress is 0
-    folder_id = Column(Integer, ForeignKey("folders.folder_id"), nullable=True)
+    folder_id = Column(Integer, ForeignKey("folders.folder_id"), nullable=True, index=True)
     length = Column(Integer, nullable=False)
+    content_hash = Column(String, ForeignKey("blobs.content_hash"), nullable=True, index=True)  # Null for legacy uploads
+    status = Column(String, nullable=False, default="ready")  # processing, ready or failed
 
     # Relationships with cascade deletion
     user = relationship("User", back_populates="documents")
     folder = relationship("Folder", back_populates="documents")
+    blob = relationship("Blob", back_populates="documents")
     bookmarks = relationship("Bookmark", back_populates="document", cascade="all, delete-orphan")  # Added cascade
     notes = relationship("Note", back_populates="document", cascade="all, delete-orphan")  # Added cascade
     audiobooks = relationship("AudioBook", back_populates="document", cascade="all, delete-orphan")  
+    pages = relationship("DocumentPage", back_populates="document", cascade="all, delete-orphan")
+
+
+# Extracted text of each document page (from the PDF text layer or OCR), filled once at upload
+class DocumentPage(Base):
+    __tablename__ = "document_pages"
+    document_id = Column(Integer, ForeignKey("documents.document_id"), primary_key=True)
+    page_number = Column(Integer, primary_key=True)  # 1-based, like Document.progress
+    raw_text = Column(Text, nullable=False, default="")
+    sanitized_text = Column(Text, nullable=False, default="")  # TTS-ready text from sanitize_pages
+    word_count = Column(Integer, nullable=False, default=0)
+    char_start = Column(Integer, nullable=False, default=0)  # Offset of the page in the whole document's raw text
+    char_end = Column(Integer, nullable=False, default=0)
+    is_ocr = Column(Boolean, nullable=False, default=False)
+
+    # Relationships
+    document = relationship("Document", back_populates="pages")
+
+
+# Uploaded file contents, stored once per sha256 and shared by documents
+class Blob(Base):
+    __tablename__ = "blobs"
+    content_hash = Column(String, primary_key=True)  # sha256 of the uploaded bytes
+    file_path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # Relationships
+    documents = relationship("Document", back_populates="blob")
 
 
 # Folder table
 class Folder(Base):
     __tablename__ = "folders"
     folder_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.email"), nullable=False)
+    user_id = Column(String, ForeignKey("users.email"), nullable=False, index=True)
     folder_name = Column(Text, nullable=False)
     parent = Column(Integer, ForeignKey("folders.folder_id"), nullable=True)
 
@@ -74,7 +107,7 @@ class Folder(Base):
 class Bookmark(Base):
     __tablename__ = "bookmarks"
     bookmark_id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False, index=True)
     page_number = Column(Integer, nullable=False)
     description = Column(Text, nullable=True)
 
@@ -85,9 +118,11 @@ class Bookmark(Base):
 # AudioBook table
 class AudioBook(Base):
     __tablename__ = "audiobooks"
+    # One audiobook per document, voice and user; its index also serves lookups by document
+    __table_args__ = (UniqueConstraint("document_id", "voice_id", "user_id", name="uq_audiobooks_document_voice_user"),)
     audiobook_id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.email"), nullable=False)
+    user_id = Column(String, ForeignKey("users.email"), nullable=False, index=True)
     voice_id = Column(Integer, ForeignKey("voices.voice_id"), nullable=False)
     progress = Column(Float, default=0.0)  # Default progress is 0
     duration = Column(Float, nullable=False)
@@ -97,6 +132,34 @@ class AudioBook(Base):
     document = relationship("Document", back_populates="audiobooks")
     user = relationship("User", back_populates="audiobooks")
     voice = relationship("Voice", back_populates="audiobooks")
+    job = relationship("AudiobookJob", back_populates="audiobook", uselist=False, cascade="all, delete-orphan")
+
+
+# Audiobook generation queue, claimed by worker processes (backend/worker.py)
+class AudiobookJob(Base):
+    __tablename__ = "audiobook_jobs"
+    job_id = Column(Integer, primary_key=True, index=True)
+    audiobook_id = Column(Integer, ForeignKey("audiobooks.audiobook_id"), nullable=False, unique=True)
+    user_id = Column(String, ForeignKey("users.email"), nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    priority = Column(Integer, default=0)  # Higher runs first
+    bitrate = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    pages_done = Column(Integer, default=0)
+    total_pages = Column(Integer, nullable=True)
+    focus_page = Column(Integer, nullable=True)  # 1-based page synthesized first; follows the reader
+    cache_hits = Column(Integer, default=0)  # Sentences served from the synthesis cache
+    cache_misses = Column(Integer, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    run_after = Column(DateTime, nullable=True)  # Backoff: not claimable before this time
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    audiobook = relationship("AudioBook", back_populates="job")
 
 
 # Voices table
@@ -113,7 +176,7 @@ class Voice(Base):
 class Note(Base):
     __tablename__ = "notes"
     note_id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False, index=True)
     note_title = Column(Text, nullable=False)
     content = Column(Text, nullable=False)
     page = Column(Integer, nullable=False)
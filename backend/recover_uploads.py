@@ -0,0 +1,28 @@
+"""
+Settle uploads cut off by a crash or restart.
+
+Uploads are processed in the API processes' background tasks, so nothing
+finishes a document left "processing" once they stop. Run this after
+stopping the API and before starting it again (from the repository root):
+
+    python -m backend.recover_uploads
+
+Never run it next to a live API process (another uvicorn worker, or the
+old process during a reload): it would fail that process's in-flight
+uploads and delete their temp files.
+"""
+import logging
+from backend.database import engine
+from backend.controllers.db_migrations import upgrade_database
+from backend.controllers.upload_pipeline import recover_uploads
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    upgrade_database(engine)
+    recover_uploads()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from pathlib import Path
-from TTS.api import TTS
 from ..models import AudioBook, Voice, Document
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas import GenerateAudiobookRequest
-import fitz
-import torch
-import re
-from pydub import AudioSegment
+from ..controllers.tts_engine import synthesize_pages
+from ..controllers.wav_writer import StreamingWavWriter
+from ..controllers.audiobook_manifest import start_manifest, add_segment, complete_manifest, load_manifest, ready_ranges, completed_pages, segment_path, api_page
+from ..controllers.transcoder import AUDIO_FORMATS, LOSSLESS_FORMATS, audio_extension, encode, get_variant, master_path, valid_bitrate
+from ..controllers.job_queue import enqueue_job, retry_job, job_status, set_focus, ON_DEMAND_PRIORITY
+from ..controllers.synthesis_cache import synthesis_cache
+from ..controllers.public_url import public_url
+from ..controllers.progress_buffer import progress_buffer
+from ..models import AudiobookJob
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
 import os
+import threading
 
 # Directory to store audiobooks
 AUDIOBOOK_DIR = Path("audiobooks")
@@ -20,127 +30,227 @@ audiobook_router = APIRouter(
     tags=["Audiobooks"]
 )
 
+
+async def find_audiobook(db: AsyncSession, audiobook_id: int, *related):
+    """Load an audiobook with the given relationships (an AsyncSession can't lazy-load them later)."""
+    return await db.scalar(
+        select(AudioBook).options(*(selectinload(r) for r in related)).where(AudioBook.audiobook_id == audiobook_id)
+    )
+
+
+async def find_existing_audiobook(db: AsyncSession, document_id: int, voice_id: int, user_id: str):
+    return await db.scalar(select(AudioBook).options(selectinload(AudioBook.job)).where(
+        AudioBook.document_id == document_id,
+        AudioBook.voice_id == voice_id,
+        AudioBook.user_id == user_id
+    ))
+
+
 @audiobook_router.post("/generate/{document_id}")
 async def generate_audiobook(
     document_id: int,
     request: GenerateAudiobookRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    # Fetch the document from the database
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # An audiobook belongs to the document's owner (its file is per document and voice),
+    # whoever asks for it. Read before any commit or rollback expires the document
+    user_id = document.user_id
+    focus_page = progress_buffer.get(document_id, document.progress) or None
+
     # Check if the audiobook already exists for the same user, document, and voice
-    existing_audiobook = db.query(AudioBook).filter(
-        AudioBook.document_id == document_id,
-        AudioBook.voice_id == request.voice_id,
-        AudioBook.user_id == request.user_id
-    ).first()
+    existing_audiobook = await find_existing_audiobook(db, document_id, request.voice_id, user_id)
 
     if existing_audiobook:
+        # A failed generation is queued again; the worker resumes from the first missing page
+        if existing_audiobook.job and existing_audiobook.job.status == "failed":
+            await db.run_sync(retry_job, existing_audiobook.job, request.priority)
+            return {
+                "message": "Audiobook generation restarted",
+                "audiobook_id": existing_audiobook.audiobook_id,
+                "file_path": public_url(existing_audiobook.file_path)
+            }
+        # Created before the job queue, by a BackgroundTasks run that died with its process
+        if existing_audiobook.job is None and not Path(existing_audiobook.file_path).exists():
+            if not valid_bitrate(request.bitrate):
+                raise HTTPException(status_code=422, detail="Bitrate must look like 48k or 128k")
+            response = {
+                "message": "Audiobook generation restarted",
+                "audiobook_id": existing_audiobook.audiobook_id,
+                "file_path": public_url(existing_audiobook.file_path)
+            }
+            try:
+                await db.run_sync(enqueue_job, existing_audiobook, request.bitrate, request.priority, focus_page)
+            except IntegrityError:
+                await db.rollback()  # A concurrent request queued it first
+            return response
         return {
             "message": "Audiobook already exists.",
             "audiobook_id": existing_audiobook.audiobook_id,
-            "file_path": f"http://127.0.0.1:8000/{existing_audiobook.file_path}"
+            "file_path": public_url(existing_audiobook.file_path)
         }
 
-    # Fetch the document from the database
-    document = db.query(Document).filter(Document.document_id == document_id).first()
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
+    if request.format not in AUDIO_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported audio format. Choose one of: {', '.join(AUDIO_FORMATS)}")
+    if not valid_bitrate(request.bitrate):
+        raise HTTPException(status_code=422, detail="Bitrate must look like 48k or 128k")
+
+    # Its pages are only in the page store once the upload has been processed
+    if document.status != "ready":
+        raise HTTPException(status_code=409, detail=f"Document is not ready for audio (status: {document.status})")
     
     # Fetch the voice from the database
-    voice = db.query(Voice).filter(Voice.voice_id == request.voice_id).first()
+    voice = await db.get(Voice, request.voice_id)
     if not voice:
         raise HTTPException(status_code=404, detail="Voice not found")
     
     # Define the path for the audiobook
-    audio_file_path = AUDIOBOOK_DIR / f"{document_id}_{request.voice_id}.wav"
-
-    # Add the TTS conversion task to the background tasks
-    try:
-        background_tasks.add_task(
-            convert_document_to_audio_page_by_page,
-            document.file_path,
-            str(audio_file_path),
-            voice.voice
-        )
-    except Exception as e:
-        print(f"Error in generating audiobook: {e}")
-        raise HTTPException(status_code=500, detail=f"Error in generating audiobook: {e}")
+    audio_file_path = AUDIOBOOK_DIR / f"{document_id}_{request.voice_id}.{audio_extension(request.format)}"
 
     # Add the audiobook to the database
     audiobook = AudioBook(
         document_id=document_id,
-        user_id=document.user_id,
+        user_id=user_id,
         voice_id=request.voice_id,
         file_path=str(audio_file_path),
         progress=0.0,
         duration=0.0  # Placeholder; duration can be updated later
     )
     db.add(audiobook)
-    db.commit()
-    db.refresh(audiobook)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request created it first (one audiobook per document, voice and user)
+        await db.rollback()
+        existing_audiobook = await find_existing_audiobook(db, document_id, request.voice_id, user_id)
+        return {
+            "message": "Audiobook already exists.",
+            "audiobook_id": existing_audiobook.audiobook_id,
+            "file_path": public_url(existing_audiobook.file_path)
+        }
+    await db.refresh(audiobook)
 
-    return {"message": "Audiobook generation started", "audiobook_id": audiobook.audiobook_id, "file_path": f"http://127.0.0.1:8000/{audio_file_path}"}
+    # Queue the TTS conversion for a worker process (python -m backend.worker),
+    # starting from the page the user is reading
+    await db.run_sync(enqueue_job, audiobook, request.bitrate, request.priority, focus_page)
 
-def convert_document_to_audio_page_by_page(file_path: str, audio_file_path: str, voice: str):
-    """Convert document text to audio page by page using Coqui TTS."""
-    tts = TTS(model_name=voice)
-    audio_segments = []
-    page_audio_paths = []  # Store paths of individual page audio files
+    return {"message": "Audiobook generation started", "audiobook_id": audiobook.audiobook_id, "file_path": public_url(audio_file_path)}
 
-    # Open the PDF file and extract text page by page
-    with fitz.open(file_path) as pdf:
-        for page_num, page in enumerate(pdf):
-            text = page.get_text()
-            text = sanitize_text(text)
+def tts_pages(document_pages):
+    """(page_num, text) pairs to synthesize from stored DocumentPage rows; page_num is 0-based."""
+    return [
+        (page.page_number - 1, page.sanitized_text)
+        for page in document_pages
+        if page.sanitized_text.strip()  # Skip empty pages
+    ]
 
-            if not text.strip():
-                continue  # Skip empty pages
+def convert_document_to_audio_page_by_page(pages, audio_file_path: str, voice: str, audio_format: str = "wav", bitrate: str = None, workers: int = None, on_progress=None, focus=None):
+    """
+    Convert document text to audio page by page using Coqui TTS.
 
-            # Generate audio for the page
-            page_audio_path = f"{audio_file_path}_page_{page_num}.wav"
-            tts.tts_to_file(text=text, file_path=page_audio_path)
-            audio_segments.append(AudioSegment.from_wav(page_audio_path))
-            page_audio_paths.append(page_audio_path)  # Store the path for cleanup
+    `pages` are (page_num, sanitized text) pairs, read from the page store
+    with tts_pages(). `on_progress` is called with (pages_done, total_pages,
+    cache_hits, cache_misses) as pages finish. `focus` returns the page_num
+    the listener needs first; see synthesize_pages.
+    Returns the duration of the audiobook in seconds.
+    """
+    if not pages:
+        # Nothing to write; the job must fail rather than complete without a file
+        raise ValueError("Document has no page text to synthesize")
 
-    # Merge all audio segments into one file
-    combined_audio = sum(audio_segments)
-    combined_audio.export(audio_file_path, format="wav")
+    # A run that finished the book but lost its lease before recording it has nothing left to do
+    page_nums = [page_num for page_num, _ in pages]
+    manifest = load_manifest(audio_file_path)
+    if manifest and manifest["status"] == "completed" and manifest["pages"] == page_nums and Path(audio_file_path).exists():
+        return manifest["duration"]
 
-    # Clean up individual page audio files
-    for page_audio_path in page_audio_paths:
-        os.remove(page_audio_path)  # Use the stored path for cleanup
+    # Publish each page as a playable segment as soon as it is ready
+    # Pages already checkpointed by an interrupted run are not synthesized again
+    manifest = start_manifest(audio_file_path, page_nums)
+    done = completed_pages(manifest)
+    pending = [(page_num, text) for page_num, text in pages if page_num not in done]
+    pages_done = len(done)
+    cache_hits = cache_misses = 0
+    if on_progress:
+        on_progress(pages_done, len(pages), cache_hits, cache_misses)
 
-def sanitize_text(input_text):
-    # Remove non-English characters
-    sanitized = re.sub(r'[^\x00-\x7F]+', ' ', input_text)
-    
-    # Remove unnecessary symbols (like images/logos) and excessive spaces
-    sanitized = re.sub(r'[^\w\s.,!?]', '', sanitized)  # Keep common punctuation
-    sanitized = re.sub(r'\s+', ' ', sanitized).strip()  # Remove extra spaces
-    
-    # Fix words without spaces (basic heuristic for camelCase or ALLCAPS)
-    sanitized = re.sub(r'([a-z])([A-Z])', r'\1 \2', sanitized)  # camelCase to camel Case
-    sanitized = re.sub(r'([A-Z]{2,})([a-z])', r'\1 \2', sanitized)  # ALLCAPSto ALL CAPS
-    
-    # Ensure proper punctuation (add periods at the end of sentences if missing)
-    sanitized = re.sub(r'(?<![.!?])\n', '.\n', sanitized)  # Add periods before new lines if none exist
-    sanitized = re.sub(r'(?<![.!?])$', '.', sanitized)  # Add period at the end of the text if missing
-    
-    return sanitized
+    def on_page_done(page_num, page_audio_path, hits, misses):
+        nonlocal pages_done, cache_hits, cache_misses
+        add_segment(audio_file_path, page_num, page_audio_path)
+        pages_done += 1
+        cache_hits += hits
+        cache_misses += misses
+        if on_progress:
+            on_progress(pages_done, len(pages), cache_hits, cache_misses)
+
+    # Generate audio for the remaining pages across the worker pool, the reader's page first
+    synthesize_pages(pending, audio_file_path, voice, workers, on_page_done, focus)
+
+    # Merge only once every page is on disk
+    page_audio_paths = [segment_path(audio_file_path, page_num) for page_num, _ in pages]
+    missing = [path for path in page_audio_paths if not Path(path).exists()]
+    if missing:
+        raise RuntimeError(f"{len(missing)} page(s) missing audio, not merging: {missing[0]}")
+
+    # Stream each page's frames into a temp WAV; only one chunk is held in memory.
+    # The name is per process and thread, in case a worker that lost the job is merging too
+    merged_path = f"{audio_file_path}.{os.getpid()}.{threading.get_ident()}.merged.wav"
+    try:
+        with StreamingWavWriter(merged_path) as writer:
+            for page_audio_path in page_audio_paths:
+                writer.append_wav(page_audio_path)
+
+        # Compress into the requested format; the final file only appears once complete.
+        # A lossy book keeps a FLAC master to transcode its download variants from
+        if audio_format == "wav":
+            os.replace(merged_path, audio_file_path)
+        else:
+            encode(merged_path, audio_file_path, audio_format, bitrate)
+            if audio_format not in LOSSLESS_FORMATS:
+                encode(merged_path, str(master_path(audio_file_path)), "flac")
+    finally:
+        Path(merged_path).unlink(missing_ok=True)
+    complete_manifest(audio_file_path, writer.duration)
+
+    # Pages now play from the book itself (see complete_manifest); drop the uncompressed segments
+    for page_audio_path in page_audio_paths:
+        Path(page_audio_path).unlink(missing_ok=True)
+    return writer.duration
 
 @audiobook_router.get("/voices")
-async def get_voices(db: Session = Depends(get_db)):
+async def get_voices(db: AsyncSession = Depends(get_async_db)):
     """Fetch available voices from the database."""
-    voices = db.query(Voice).all()
+    voices = (await db.scalars(select(Voice))).all()
     return {"voices": [{"voice_id": v.voice_id, "name": v.voice} for v in voices]}
 
+@audiobook_router.get("/cache/stats")
+async def get_synthesis_cache_stats(db: AsyncSession = Depends(get_async_db)):
+    """Hit/miss counters of the sentence synthesis cache, summed over all jobs."""
+    hits, misses = (await db.execute(select(
+        func.coalesce(func.sum(AudiobookJob.cache_hits), 0),
+        func.coalesce(func.sum(AudiobookJob.cache_misses), 0)
+    ))).one()
+    stats = await run_in_threadpool(synthesis_cache.stats)
+    stats.update({
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None
+    })
+    return stats
+
 @audiobook_router.get("/user/{user_id}")
 async def get_user_audiobooks(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Fetch all unique audiobooks for a specific user."""
-    audiobooks = db.query(AudioBook).filter(AudioBook.user_id == user_id).all()
+    audiobooks = (await db.scalars(
+        select(AudioBook).options(selectinload(AudioBook.document)).where(AudioBook.user_id == user_id)
+    )).all()
     
     if not audiobooks:
         raise HTTPException(status_code=404, detail="No audiobooks found for this user.")
@@ -161,18 +271,148 @@ async def get_user_audiobooks(
 @audiobook_router.get("/status/{audiobook_id}")
 async def get_audiobook_status(
     audiobook_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Check the status of an audiobook generation."""
-    audiobook = db.query(AudioBook).filter(AudioBook.audiobook_id == audiobook_id).first()
+    """Check the status of an audiobook generation; ready_pages are 1-based ranges, like focus_page."""
+    audiobook = await find_audiobook(db, audiobook_id, AudioBook.job)
     if not audiobook:
         raise HTTPException(status_code=404, detail="Audiobook not found")
     
-    # Check if the audiobook file exists
+    manifest = load_manifest(audiobook.file_path)
+    ranges = ready_ranges(manifest) if manifest else []
+
+    # Report the queue state: queued, running (page k of n), failed or completed
+    if audiobook.job:
+        status = job_status(audiobook.job)
+        status["ready_pages"] = ranges
+        if audiobook.job.status == "completed":
+            status["file_path"] = public_url(audiobook.file_path)
+        return status
+
+    # Audiobooks generated before the job queue existed only have their file
     if Path(audiobook.file_path).exists():
         return {
             "status": "completed",
-            "file_path": f"http://127.0.0.1:8000/{audiobook.file_path}"  # Return full URL
+            "file_path": public_url(audiobook.file_path),  # Return full URL
+            "ready_pages": ranges
         }
     else:
-        return {"status": "in_progress"}
\ No newline at end of file
+        return {"status": "in_progress", "ready_pages": ranges}
+
+@audiobook_router.get("/download/{audiobook_id}")
+async def download_audiobook(
+    audiobook_id: int,
+    format: str = None,
+    bitrate: str = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Return the audiobook in another format or bitrate, transcoding it once and caching the result."""
+    if not valid_bitrate(bitrate):
+        raise HTTPException(status_code=422, detail="Bitrate must look like 48k or 128k")
+    audiobook = await db.get(AudioBook, audiobook_id)
+    if not audiobook:
+        raise HTTPException(status_code=404, detail="Audiobook not found")
+    if not Path(audiobook.file_path).exists():
+        raise HTTPException(status_code=409, detail="Audiobook is still being generated")
+
+    source_format = next((f for f, spec in AUDIO_FORMATS.items() if audiobook.file_path.endswith(f".{spec['ext']}")), None)
+    format = format or source_format
+    if format not in AUDIO_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported audio format. Choose one of: {', '.join(AUDIO_FORMATS)}")
+
+    try:
+        variant = await run_in_threadpool(get_variant, audiobook.file_path, format, bitrate)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"format": format, "file_path": public_url(variant.as_posix())}
+
+@audiobook_router.get("/manifest/{audiobook_id}")
+async def get_audiobook_manifest(
+    audiobook_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List the page segments that are ready to play, in page order (pages are 1-based)."""
+    audiobook = await db.get(AudioBook, audiobook_id)
+    if not audiobook:
+        raise HTTPException(status_code=404, detail="Audiobook not found")
+
+    manifest = load_manifest(audiobook.file_path)
+    if not manifest:
+        return {"status": "in_progress", "total_pages": None, "ready_pages": [], "segments": []}
+
+    segment_dir = Path(audiobook.file_path).parent
+    segments = [
+        {
+            "page": api_page(page_num),
+            "duration": manifest["segments"][str(page_num)]["duration"],
+            "start": manifest["segments"][str(page_num)].get("start"),  # Offset in file_path once the book is complete
+            "file_path": public_url(segment_dir / manifest['segments'][str(page_num)]['file'])
+        }
+        for page_num in manifest["pages"]
+        if str(page_num) in manifest["segments"]
+    ]
+    return {
+        "status": manifest["status"],
+        "total_pages": len(manifest["pages"]),
+        "ready_pages": ready_ranges(manifest),
+        "segments": segments,
+        "file_path": public_url(audiobook.file_path) if manifest["file"] else None
+    }
+
+@audiobook_router.post("/{audiobook_id}/pages")
+async def request_audiobook_pages(
+    audiobook_id: int,
+    start: int,
+    end: int = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ask for the audio of pages start..end (1-based, like Document.progress) now.
+
+    The generating job moves the first missing page of the range to the
+    front, and up the queue if it has not started yet. The response says
+    which pages of the range are ready to play.
+    """
+    audiobook = await find_audiobook(db, audiobook_id, AudioBook.job, AudioBook.document)
+    if not audiobook:
+        raise HTTPException(status_code=404, detail="Audiobook not found")
+    end = end or start
+    if start < 1 or end < start or end > audiobook.document.length:
+        raise HTTPException(status_code=400, detail=f"Pages must be within 1..{audiobook.document.length}")
+
+    manifest = load_manifest(audiobook.file_path)
+    segments = manifest["segments"] if manifest else {}
+    # Pages without text are left out of the manifest and never get audio
+    has_audio = set(manifest["pages"]) if manifest else None
+    missing = [
+        page for page in range(start, end + 1)
+        if str(page - 1) not in segments and (has_audio is None or page - 1 in has_audio)
+    ]
+
+    job = audiobook.job
+    if missing and job:
+        if job.status == "failed":
+            await db.run_sync(retry_job, job)
+        if job.status in ("queued", "running"):
+            await db.run_sync(set_focus, job, missing[0], ON_DEMAND_PRIORITY)
+
+    segment_dir = Path(audiobook.file_path).parent
+    pages = []
+    for page in range(start, end + 1):
+        segment = segments.get(str(page - 1))
+        pages.append({
+            "page": page,
+            "ready": segment is not None,
+            "has_audio": has_audio is None or page - 1 in has_audio,
+            "duration": segment["duration"] if segment else None,
+            "start": segment.get("start") if segment else None,
+            "file_path": public_url(segment_dir / segment['file']) if segment else None
+        })
+    return {
+        "audiobook_id": audiobook.audiobook_id,
+        "status": job.status if job else ("completed" if Path(audiobook.file_path).exists() else "in_progress"),
+        "focus_page": missing[0] if missing else None,
+        "pages": pages
+    }
+
@@ -1,10 +1,11 @@
 from fastapi import FastAPI, HTTPException,APIRouter,Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from .. import schemas,database,models
 
-get_db=database.get_db
+get_db=database.get_async_db
 
 router=APIRouter(
     prefix="/api",
@@ -13,23 +14,23 @@ router=APIRouter(
 
 # Routes for bookmarks
 @router.post("/bookmarks/", response_model=schemas.BookmarkResponse)
-def create_bookmark(bookmark: schemas.BookmarkCreate, db: Session = Depends(get_db)):
+async def create_bookmark(bookmark: schemas.BookmarkCreate, db: AsyncSession = Depends(get_db)):
     # Use bookmark.model_dump() to convert the Pydantic model to a dictionary
     db_bookmark = models.Bookmark(**bookmark.model_dump())
     db.add(db_bookmark)
-    db.commit()
-    db.refresh(db_bookmark)
+    await db.commit()
+    await db.refresh(db_bookmark)
     return db_bookmark
 
 @router.get("/bookmarks/{document_id}", response_model=List[schemas.BookmarkResponse])
-def get_bookmarks(document_id: int, db: Session = Depends(get_db)):
-    return db.query(models.Bookmark).filter(models.Bookmark.document_id == document_id).all()
+async def get_bookmarks(document_id: int, db: AsyncSession = Depends(get_db)):
+    return (await db.scalars(select(models.Bookmark).where(models.Bookmark.document_id == document_id))).all()
 
 @router.delete("/bookmarks/{bookmark_id}")
-def delete_bookmark(bookmark_id: int, db: Session = Depends(get_db)):
-    db_bookmark = db.query(models.Bookmark).filter(models.Bookmark.bookmark_id == bookmark_id).first()
+async def delete_bookmark(bookmark_id: int, db: AsyncSession = Depends(get_db)):
+    db_bookmark = await db.get(models.Bookmark, bookmark_id)
     if not db_bookmark:
         raise HTTPException(status_code=404, detail="Bookmark not found")
-    db.delete(db_bookmark)
-    db.commit()
+    await db.delete(db_bookmark)
+    await db.commit()
     return {"message": "Bookmark deleted"}
\ No newline at end of file
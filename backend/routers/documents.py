@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body  # Add Body import
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, BackgroundTasks  # Add Body import
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-import fitz  # PyMuPDF
-import pytesseract  # OCR for images
-from PIL import Image  # For image processing
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
 from werkzeug.utils import secure_filename
 import logging
 from ..models import Document
-from ..database import get_db
+from ..database import get_async_db
+from ..controllers.blob_store import write_temp, acquire_blob, release_blob
+from ..controllers.page_store import get_pages_async
+from ..controllers.progress_buffer import progress_buffer
+from ..controllers.public_url import public_url
+from ..controllers.document_summary import summarize_texts
+from ..controllers.llm_client import LLMTimeout, LLMUnavailable
+from ..controllers.upload_pipeline import process_upload, process_image_batch, adopt_duplicate, index_duplicate, verify_image, page_count
+from typing import List
+import hashlib
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,39 +27,15 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 
 document_router = APIRouter()
 
-def extract_image_text(image_path: str) -> str:
-    """Extract text from image using OCR"""
-    try:
-        image = Image.open(image_path)
-        return pytesseract.image_to_string(image)
-    except Exception as e:
-        logger.error(f"Error extracting text from image: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to extract text from image")
-
-def create_pdf_from_text(text: str, output_path: str):
-    """Generate a multi-page PDF from extracted text"""
-    try:
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Split text into paragraphs and add to the PDF
-        for paragraph in text.split('\n'):
-            p = Paragraph(paragraph, styles["BodyText"])
-            story.append(p)
-
-        doc.build(story)
-    except Exception as e:
-        logger.error(f"Error generating PDF: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to generate PDF")
-
 @document_router.post("/documents/upload")
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_id: str = Form(...),
     folder_id: int = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    tmp_path = None  # Upload streamed to disk
     try:
         # Sanitize filename
         filename = secure_filename(file.filename)
@@ -67,112 +48,194 @@ async def upload_document(
                 detail="Unsupported file format. Only PDF and images (PNG, JPG, JPEG) are allowed."
             )
 
-        file_path = UPLOAD_DIR / filename
-        pdf_path = None  # Track generated PDF path
-
-        # Stream file to disk
-        with file_path.open("wb") as buffer:
-            while chunk := file.file.read(8192):  # Read in chunks
-                buffer.write(chunk)
-
-        is_scanned = False
-        length = 1
-
-        if file_ext == "pdf":
-            # Directly store the PDF without checking if it's scanned
-            length = fitz.open(str(file_path)).page_count
-        
-        elif file_ext in {"png", "jpg", "jpeg"}:
+        # Stream file to disk, hashing it as it is written
+        tmp_path, content_hash, _ = await write_temp(file, f".{file_ext}")
+        is_scanned = file_ext != "pdf"
+
+        # Identical content is stored once; reuse it (and its OCR) if we have it
+        blob = await db.run_sync(acquire_blob, content_hash)
+        if blob:
+            tmp_path.unlink()
+            new_document = Document(
+                title=filename,
+                user_id=user_id,
+                file_path=blob.file_path,
+                folder_id=folder_id,
+                is_scanned=is_scanned,
+                progress=0,
+                length=await run_in_threadpool(page_count, blob.file_path),
+                content_hash=content_hash,
+                status="ready"
+            )
+        else:
             # Validate image integrity
-            try:
-                Image.open(file_path).verify()
-            except Exception:
-                file_path.unlink()
+            if is_scanned and not await run_in_threadpool(verify_image, str(tmp_path)):
                 raise HTTPException(status_code=400, detail="Invalid image file")
 
-            # Extract text from image
-            extracted_text = extract_image_text(str(file_path))
-            is_scanned = True
-            
-            # Generate a new PDF with extracted text
-            pdf_filename = filename.rsplit('.', 1)[0] + ".pdf"
-            pdf_path = UPLOAD_DIR / pdf_filename
-            create_pdf_from_text(extracted_text, str(pdf_path))
-            
-            # Remove the original image and replace it with the new PDF
-            file_path.unlink()
-            file_path = pdf_path
+            # Storing, OCR and PDF generation continue after the response is sent
+            new_document = Document(
+                title=filename,
+                user_id=user_id,
+                file_path=str(tmp_path),
+                folder_id=folder_id,
+                is_scanned=is_scanned,
+                progress=0,
+                length=0,
+                status="processing"
+            )
 
         # Create document record in the database
+        db.add(new_document)
+        # A duplicate takes its pages and OCR flag from a stored copy, in the same transaction
+        if blob and not await db.run_sync(adopt_duplicate, new_document):
+            new_document.status = "processing"
+        await db.commit()
+        await db.refresh(new_document)
+
+        if not blob:
+            background_tasks.add_task(process_upload, new_document.document_id, tmp_path, content_hash, file_ext)
+        elif new_document.status == "processing":
+            background_tasks.add_task(index_duplicate, new_document.document_id, content_hash, blob.file_path)
+
+        return {
+            "message": "Document uploaded successfully",
+            "document_id": new_document.document_id,
+            "status": new_document.status
+        }
+
+    except HTTPException:
+        if tmp_path and tmp_path.exists():
+            tmp_path.unlink()
+        raise  # Re-raise FastAPI HTTP exceptions
+    except Exception as e:
+        logger.error(f"Error uploading file: {e}", exc_info=True)
+        # Clean up files in case of error
+        if tmp_path and tmp_path.exists():
+            tmp_path.unlink()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@document_router.post("/documents/upload-images")
+async def upload_images(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    user_id: str = Form(...),
+    title: str = Form(None),
+    folder_id: int = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Upload several images (e.g. scanned pages) as one document, one page per image."""
+    tmp_paths = []
+    try:
+        image_hashes = []
+        for file in files:
+            file_ext = Path(secure_filename(file.filename)).suffix.lower()[1:]
+            if file_ext not in {"png", "jpg", "jpeg"}:
+                raise HTTPException(status_code=400, detail="Only images (PNG, JPG, JPEG) can be uploaded as pages.")
+
+            tmp_path, image_hash, _ = await write_temp(file, f".{file_ext}")
+            tmp_paths.append(tmp_path)
+            image_hashes.append(image_hash)
+
+            if not await run_in_threadpool(verify_image, str(tmp_path)):
+                raise HTTPException(status_code=400, detail=f"Invalid image file: {file.filename}")
+
+        # The same images in the same order are the same document
+        content_hash = hashlib.sha256("".join(image_hashes).encode()).hexdigest()
+        title = secure_filename(title or "") or Path(secure_filename(files[0].filename)).stem + ".pdf"
+
+        blob = await db.run_sync(acquire_blob, content_hash)
         new_document = Document(
-            title=filename,
+            title=title,
             user_id=user_id,
-            file_path=str(file_path),
+            file_path=blob.file_path if blob else str(tmp_paths[0]),
             folder_id=folder_id,
-            is_scanned=is_scanned,
+            is_scanned=True,
             progress=0,
-            length=length
+            length=len(files),
+            content_hash=content_hash if blob else None,
+            status="ready" if blob else "processing"
         )
-
         db.add(new_document)
-        db.commit()
-        db.refresh(new_document)
+        # A duplicate takes its pages from a stored copy, in the same transaction
+        if blob and not await db.run_sync(adopt_duplicate, new_document):
+            new_document.status = "processing"
+        await db.commit()
+        await db.refresh(new_document)
+
+        if blob:
+            for tmp_path in tmp_paths:
+                tmp_path.unlink()
+            if new_document.status == "processing":
+                background_tasks.add_task(index_duplicate, new_document.document_id, content_hash, blob.file_path)
+        else:
+            background_tasks.add_task(process_image_batch, new_document.document_id, tmp_paths, content_hash)
 
-        return {"message": "Document uploaded successfully", "document_id": new_document.document_id}
+        return {
+            "message": "Document uploaded successfully",
+            "document_id": new_document.document_id,
+            "status": new_document.status
+        }
 
     except HTTPException:
-        raise  # Re-raise FastAPI HTTP exceptions
+        for tmp_path in tmp_paths:
+            tmp_path.unlink(missing_ok=True)
+        raise
     except Exception as e:
-        logger.error(f"Error uploading file: {e}", exc_info=True)
-        # Clean up files in case of error
-        if file_path.exists():
-            file_path.unlink()
-        if pdf_path and pdf_path.exists():
-            pdf_path.unlink()
+        logger.error(f"Error uploading images: {e}", exc_info=True)
+        for tmp_path in tmp_paths:
+            tmp_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def with_buffered_progress(db: AsyncSession, documents):
+    """Show progress not flushed to the database yet; documents are detached so it is never written back."""
+    for document in documents:
+        db.expunge(document)
+        document.progress = progress_buffer.get(document.document_id, document.progress)
+    return documents
+
+
 @document_router.get("/documents/{user_id}")
-async def get_user_documents(user_id: str, db: Session = Depends(get_db)):
+async def get_user_documents(user_id: str, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Fetching documents for user: {user_id}")
-    documents = db.query(Document).filter(Document.user_id == user_id).all()
+    documents = (await db.scalars(select(Document).where(Document.user_id == user_id))).all()
 
     if not documents:
         logger.warning(f"No documents found for user: {user_id}")
     else:
         logger.info(f"Documents found: {len(documents)}")
 
-    return {"documents": documents}
+    return {"documents": with_buffered_progress(db, documents)}
 
 
 @document_router.get("/folders/{folder_id}/documents")
-async def get_documents_in_folder(folder_id: int, db: Session = Depends(get_db)):
+async def get_documents_in_folder(folder_id: int, db: AsyncSession = Depends(get_async_db)):
     """Retrieve all documents within a specific folder."""
-    documents = db.query(Document).filter(Document.folder_id == folder_id).all()
-    return {"documents": documents}
+    documents = (await db.scalars(select(Document).where(Document.folder_id == folder_id))).all()
+    return {"documents": with_buffered_progress(db, documents)}
 
 
 @document_router.put("/documents/move/{document_id}")
-async def move_document(document_id: int, folder_id: int, db: Session = Depends(get_db)):
+async def move_document(document_id: int, folder_id: int, db: AsyncSession = Depends(get_async_db)):
     """Move a document to another folder."""
-    document = db.query(Document).filter(Document.document_id == document_id).first()
+    document = await db.get(Document, document_id)
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
     document.folder_id = folder_id  # Assign new folder ID
-    db.commit()
+    await db.commit()
 
     return {"message": "Document moved successfully"}
 
 
 @document_router.delete("/documents/delete/{document_id}")
-async def delete_document(document_id: int, db: Session = Depends(get_db)):
+async def delete_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a document permanently."""
     # Log the incoming delete request
     logger.info(f"Received request to delete document with ID: {document_id}")
 
     # Attempt to retrieve the document from the database
-    document = db.query(Document).filter(Document.document_id == document_id).first()
+    document = await db.get(Document, document_id)
 
     if not document:
         logger.warning(f"Document with ID {document_id} not found in database!")
@@ -180,29 +243,37 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
 
     logger.info(f"Found document: {document.title}, file path: {document.file_path}")
 
-    # Log the attempt to delete the file
-    try:
-        file_path = Path(document.file_path)
-        logger.info(f"Attempting to delete file at: {file_path}")
-        
-        if file_path.exists():
-            logger.info(f"File found at {file_path}, deleting it.")
-            file_path.unlink()  # Delete the file
-        else:
-            logger.warning(f"File not found at path: {file_path}")
-    except Exception as e:
-        logger.error(f"Error deleting file: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to delete file")
+    content_hash = document.content_hash
+
+    # Legacy uploads own their file; deduplicated ones share a blob released below
+    if not content_hash:
+        try:
+            file_path = Path(document.file_path)
+            logger.info(f"Attempting to delete file at: {file_path}")
+            
+            if file_path.exists():
+                logger.info(f"File found at {file_path}, deleting it.")
+                file_path.unlink()  # Delete the file
+            else:
+                logger.warning(f"File not found at path: {file_path}")
+        except Exception as e:
+            logger.error(f"Error deleting file: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Failed to delete file")
 
     # Log the attempt to delete the document from the database
     try:
-        db.delete(document)
-        db.commit()
+        progress_buffer.discard(document_id)
+        await db.delete(document)
+        await db.commit()
         logger.info(f"Document {document_id} deleted from database successfully.")
     except Exception as e:
         logger.error(f"Error deleting document from database: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete document from database")
 
+    # The blob file goes away with its last document
+    if content_hash:
+        await db.run_sync(release_blob, content_hash)
+
     return {"message": "Document deleted successfully"}
 
 
@@ -210,13 +281,13 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
 async def update_document_progress(
     document_id: int, 
     progress: int = Body(...),  # Accept JSON payload
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update the progress (page number) of a document."""
     
     logger.info(f"Received progress: {progress} for document ID: {document_id}")
     
-    document = db.query(Document).filter(Document.document_id == document_id).first()
+    document = await db.get(Document, document_id)
 
     if not document:
         logger.error(f"Document with ID {document_id} not found in the database!")
@@ -236,23 +307,18 @@ async def update_document_progress(
             }]
         )
 
-    # If validation passes, update progress
-    try:
-        document.progress = progress
-        db.commit()
-        logger.info(f"Successfully updated progress for document ID {document_id} to {progress}")
-    except Exception as e:
-        logger.error(f"Error committing progress update: {e}", exc_info=True)
-        db.rollback()
-        raise HTTPException(status_code=500, detail="Internal server error")
+    # If validation passes, buffer the update; page turns are written in batches
+    # (and audiobooks still being generated switch to the reader's page then)
+    progress_buffer.record(document_id, progress)
+    logger.info(f"Successfully updated progress for document ID {document_id} to {progress}")
 
     return {"message": "Document progress updated successfully"}
 
 
 
 @document_router.get("/documents/view/{document_id}")
-async def view_document(document_id: int, db: Session = Depends(get_db)):
-    document = db.query(Document).filter(Document.document_id == document_id).first()
+async def view_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
+    document = await db.get(Document, document_id)
 
     if not document:
         logger.warning(f"Document with ID {document_id} not found in database!")
@@ -262,7 +328,68 @@ async def view_document(document_id: int, db: Session = Depends(get_db)):
     return {
         "document_id": document.document_id,
         "title": document.title,
-        "file_path": f"http://127.0.0.1:8000/uploads/{Path(document.file_path).name}",
-        "progress": document.progress,
-        "length": document.length
-    }
\ No newline at end of file
+        "file_path": public_url(document.file_path),
+        "progress": progress_buffer.get(document.document_id, document.progress),
+        "length": document.length,
+        "status": document.status
+    }
+
+
+@document_router.get("/documents/{document_id}/pages")
+async def get_document_pages(document_id: int, start: int = None, end: int = None, db: AsyncSession = Depends(get_async_db)):
+    """Stored per-page text of a document, optionally limited to pages start..end (1-based)."""
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document.status != "ready":
+        raise HTTPException(status_code=409, detail=f"Document is {document.status}")
+
+    pages = await get_pages_async(db, document, start, end)
+    return {
+        "document_id": document.document_id,
+        "pages": [
+            {
+                "page_number": page.page_number,
+                "raw_text": page.raw_text,
+                "sanitized_text": page.sanitized_text,
+                "word_count": page.word_count,
+                "char_start": page.char_start,
+                "char_end": page.char_end,
+                "is_ocr": page.is_ocr,
+            }
+            for page in pages
+        ],
+    }
+
+
+@document_router.get("/documents/{document_id}/summary")
+async def get_document_summary(document_id: int, start: int = None, end: int = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Summary of a whole document, or of pages start..end (1-based) for a chapter.
+
+    Built server-side from the stored pages by map-reduce, so any length fits
+    the model's context; see controllers/document_summary.py.
+    """
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document.status != "ready":
+        raise HTTPException(status_code=409, detail=f"Document is {document.status}")
+
+    pages = await get_pages_async(db, document, start, end)
+    if not any(page.raw_text.strip() for page in pages):
+        raise HTTPException(status_code=400, detail="No text found in the requested pages")
+    try:
+        result = await summarize_texts([page.raw_text for page in pages])
+    except LLMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "document_id": document.document_id,
+        "start": pages[0].page_number,
+        "end": pages[-1].page_number,
+        **result,
+    }
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Request
+from pathlib import Path
+from ..controllers.blob_store import UPLOAD_DIR, BLOB_DIR
+from ..controllers.file_streaming import file_response
+
+AUDIOBOOK_DIR = Path("audiobooks")
+
+# Serves /uploads and /audiobooks with byte ranges and conditional requests.
+# Included after the API routers so /audiobooks/status/... etc. match first.
+router = APIRouter(tags=["Files"])
+
+
+def _resolve(base: Path, path: str) -> Path:
+    """Map a URL path onto a file under `base`, refusing traversal and internal files."""
+    relative = Path(path)
+    if any(part.startswith(".") for part in relative.parts) or relative.suffix == ".part":
+        raise HTTPException(status_code=404, detail="File not found")  # Caches and temp files
+    full_path = (base / relative).resolve()
+    if base.resolve() not in full_path.parents:
+        raise HTTPException(status_code=404, detail="File not found")
+    return full_path
+
+
+@router.api_route("/uploads/{path:path}", methods=["GET", "HEAD"])
+def stream_upload(path: str, request: Request):
+    file_path = _resolve(UPLOAD_DIR, path)
+    if file_path.parent == (UPLOAD_DIR / "tmp").resolve():
+        raise HTTPException(status_code=404, detail="File not found")
+    # Blobs are named by their content hash, so they never change
+    return file_response(request, file_path, immutable=file_path.parent == BLOB_DIR.resolve())
+
+
+@router.api_route("/audiobooks/{path:path}", methods=["GET", "HEAD"])
+def stream_audiobook(path: str, request: Request):
+    return file_response(request, _resolve(AUDIOBOOK_DIR, path))
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from ..models import Folder, Document  # ✅ Import Document model
-from ..database import get_db
+from ..database import get_async_db
+from ..controllers.blob_store import release_blob
+from ..controllers.progress_buffer import progress_buffer
 
 folder_router = APIRouter()
 
@@ -14,43 +17,49 @@ class FolderRenameRequest(BaseModel):
     folder_name: str
 
 @folder_router.post("/folders/create")
-async def create_folder(request: FolderCreateRequest, db: Session = Depends(get_db)):
+async def create_folder(request: FolderCreateRequest, db: AsyncSession = Depends(get_async_db)):
     new_folder = Folder(user_id=request.user_id, folder_name=request.folder_name)
     db.add(new_folder)
-    db.commit()
-    db.refresh(new_folder)
+    await db.commit()
+    await db.refresh(new_folder)
     return {"message": "Folder created successfully", "folder": new_folder}
 
 
 @folder_router.get("/folders/{user_id}")
-async def get_folders(user_id: str, db: Session = Depends(get_db)):
-    folders = db.query(Folder).filter(Folder.user_id == user_id).all()
+async def get_folders(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    folders = (await db.scalars(select(Folder).where(Folder.user_id == user_id))).all()
     return {"folders": folders}
 
 @folder_router.put("/folders/rename/{folder_id}")
-async def rename_folder(folder_id: int, request: FolderRenameRequest, db: Session = Depends(get_db)):
-    folder = db.query(Folder).filter(Folder.folder_id == folder_id).first()
+async def rename_folder(folder_id: int, request: FolderRenameRequest, db: AsyncSession = Depends(get_async_db)):
+    folder = await db.get(Folder, folder_id)
     if not folder:
         raise HTTPException(status_code=404, detail="Folder not found")
     
     folder.folder_name = request.folder_name
-    db.commit()
+    await db.commit()
     return {"message": "Folder renamed successfully"}
 
 
 @folder_router.delete("/folders/delete/{folder_id}")
-async def delete_folder(folder_id: int, db: Session = Depends(get_db)):
-    folder = db.query(Folder).filter(Folder.folder_id == folder_id).first()
+async def delete_folder(folder_id: int, db: AsyncSession = Depends(get_async_db)):
+    folder = await db.get(Folder, folder_id)
     if not folder:
         raise HTTPException(status_code=404, detail="Folder not found")
 
     # ✅ Find and delete all documents inside the folder
-    documents = db.query(Document).filter(Document.folder_id == folder_id).all()
+    documents = (await db.scalars(select(Document).where(Document.folder_id == folder_id))).all()
+    content_hashes = [doc.content_hash for doc in documents if doc.content_hash]
     for doc in documents:
-        db.delete(doc)
+        progress_buffer.discard(doc.document_id)
+        await db.delete(doc)
 
     # ✅ Now delete the folder
-    db.delete(folder)
-    db.commit()
+    await db.delete(folder)
+    await db.commit()
+
+    # ✅ Release the stored files; each blob is removed with its last document
+    for content_hash in content_hashes:
+        await db.run_sync(release_blob, content_hash)
     
     return {"message": "Folder and all associated documents deleted successfully"}
\ No newline at end of file
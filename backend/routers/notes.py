@@ -1,10 +1,11 @@
 from fastapi import FastAPI, HTTPException,APIRouter,Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from .. import schemas,database,models
 
-get_db=database.get_db
+get_db=database.get_async_db
 
 router=APIRouter(
     prefix="/api",
@@ -12,37 +13,37 @@ router=APIRouter(
 )
 
 @router.post("/notes/", response_model=schemas.NoteResponse)
-def create_note(note: schemas.NoteCreate, db: Session = Depends(get_db)):
+async def create_note(note: schemas.NoteCreate, db: AsyncSession = Depends(get_db)):
     db_note = models.Note(**note.model_dump())
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     return db_note
 
 
 @router.get("/notes/{document_id}", response_model=List[schemas.NoteResponse])
-def get_notes(document_id: int, db: Session = Depends(get_db)):
-    return db.query(models.Note).filter(models.Note.document_id == document_id).all()
+async def get_notes(document_id: int, db: AsyncSession = Depends(get_db)):
+    return (await db.scalars(select(models.Note).where(models.Note.document_id == document_id))).all()
 
 @router.put("/notes/{note_id}", response_model=schemas.NoteResponse)
-def update_note(note_id: int, note: schemas.NoteCreate, db: Session = Depends(get_db)):
-    db_note = db.query(models.Note).filter(models.Note.note_id == note_id).first()
+async def update_note(note_id: int, note: schemas.NoteCreate, db: AsyncSession = Depends(get_db)):
+    db_note = await db.get(models.Note, note_id)
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
     db_note.document_id = note.document_id
     db_note.note_title = note.note_title
     db_note.content = note.content
     db_note.page = note.page
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     return db_note
 
 @router.delete("/notes/{note_id}")
-def delete_note(note_id: int, db: Session = Depends(get_db)):
-    db_note = db.query(models.Note).filter(models.Note.note_id == note_id).first()
+async def delete_note(note_id: int, db: AsyncSession = Depends(get_db)):
+    db_note = await db.get(models.Note, note_id)
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
-    db.delete(db_note)
-    db.commit()
+    await db.delete(db_note)
+    await db.commit()
     return {"message": "Note deleted"}
 
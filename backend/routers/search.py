@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..controllers.search_index import search, KINDS
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"]
+)
+
+
+@router.get("/{user_id}")
+def search_library(
+    user_id: str,
+    q: str = Query(..., min_length=1),
+    kind: str = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Search the text of a user's documents, their notes and bookmark descriptions."""
+    if kind and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(KINDS)}")
+
+    total, hits = search(db, user_id, q, kind, limit=page_size, offset=(page - 1) * page_size)
+    return {
+        "query": q,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": hits,
+    }
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from ..models import Settings
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas import SettingsUpdate
 
 router = APIRouter(
@@ -13,10 +14,10 @@ router = APIRouter(
 @router.get("/{user_id}")
 async def get_settings(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Fetch the user's settings."""
-    settings = db.query(Settings).filter(Settings.user_id == user_id).first()
+    settings = (await db.scalars(select(Settings).where(Settings.user_id == user_id))).first()
     if not settings:
         raise HTTPException(status_code=404, detail="Settings not found.")
 
@@ -26,10 +27,10 @@ async def get_settings(
 async def update_settings(
     user_id: str,
     update_data: SettingsUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update the user's settings."""
-    settings = db.query(Settings).filter(Settings.user_id == user_id).first()
+    settings = (await db.scalars(select(Settings).where(Settings.user_id == user_id))).first()
     if not settings:
         raise HTTPException(status_code=404, detail="Settings not found.")
 
@@ -38,18 +39,18 @@ async def update_settings(
         if value is not None:
             setattr(settings, key, value)
 
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
 
     return {"message": "Settings updated successfully.", "settings": settings}
 
 @router.post("/update-streak/{user_id}")
 async def update_streak(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update the user's streak count on login."""
-    settings = db.query(Settings).filter(Settings.user_id == user_id).first()
+    settings = (await db.scalars(select(Settings).where(Settings.user_id == user_id))).first()
     if not settings:
         settings = Settings(
             user_id=user_id,
@@ -61,8 +62,8 @@ async def update_streak(
             voice_id=None  # No voice preference initially
         )
         db.add(settings)
-        db.commit()
-        db.refresh(settings)
+        await db.commit()
+        await db.refresh(settings)
 
     # Get the current date
     today = datetime.utcnow().date()
@@ -86,8 +87,8 @@ async def update_streak(
     # Update the last login date
     settings.last_login_date = today
 
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
 
     # Check for milestones and return a message
     milestone_message = ""
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List,Optional
+from .controllers.transcoder import DEFAULT_AUDIO_FORMAT
 
 class User(BaseModel):
     name:str
@@ -27,6 +28,9 @@ class TokenData(BaseModel):
 class GenerateAudiobookRequest(BaseModel):
     voice_id: int
     user_id:str
+    format: str = DEFAULT_AUDIO_FORMAT  # opus, mp3, aac, wav or flac
+    bitrate: Optional[str] = None  # e.g. "48k" (two or three digits and k); None uses the format default
+    priority: int = 0  # Higher priority jobs are claimed first
 
 class TextRequest(BaseModel):
     text: str
@@ -0,0 +1,175 @@
+"""
+Query plans of the hot routes: none may scan a whole table.
+
+Builds a throwaway SQLite database with upgrade_database() (the same
+migrations the API runs at startup), fills it with DOCUMENTS documents
+spread over USERS users, with their folders, notes, bookmarks, pages and
+audiobooks, and runs ANALYZE so the planner sees realistic selectivity.
+Each case then calls the real route handlers and runs EXPLAIN QUERY PLAN on
+every statement they sent to the database; any "SCAN <table>" step (a full
+table or full index scan) fails it.
+
+Run from the repository root:
+    python -m pytest backend/tests
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.controllers.db_migrations import upgrade_database
+from backend.controllers.progress_buffer import progress_buffer
+from backend.database import async_url, get_async_db, make_engine
+from backend.models import AudioBook, AudiobookJob, Blob, Bookmark, Document, DocumentPage, Folder, Note, Settings
+from backend.routers import bookmarks, documents, folders, notes, settings
+
+try:
+    from backend.routers import audiobook
+except ImportError:  # The TTS stack (torch) is not installed
+    audiobook = None
+
+DOCUMENTS = 1000
+USERS = 50
+PAGES = 10
+USER_ID = "user0@example.com"
+DOCUMENT_ID = 7
+DELETED_DOCUMENT_ID = 9
+FOLDER_ID = DOCUMENT_ID % (DOCUMENTS // 10 + 1) + 1  # The folder fill() puts DOCUMENT_ID in
+
+# (label, method, url, request body) for the busiest routes
+ROUTES = [
+    ("GET /documents/{user_id}", "GET", f"/documents/{USER_ID}", None),
+    ("GET /folders/{folder_id}/documents", "GET", f"/folders/{FOLDER_ID}/documents", None),
+    ("GET /folders/{user_id}", "GET", f"/folders/{USER_ID}", None),
+    ("GET /documents/view/{document_id}", "GET", f"/documents/view/{DOCUMENT_ID}", None),
+    ("GET /documents/{document_id}/pages", "GET", f"/documents/{DOCUMENT_ID}/pages?start=3&end=9", None),
+    ("PUT /documents/update-progress/{document_id}", "PUT", f"/documents/update-progress/{DOCUMENT_ID}", 3),
+    ("GET /api/notes/{document_id}", "GET", f"/api/notes/{DOCUMENT_ID}", None),
+    ("GET /api/bookmarks/{document_id}", "GET", f"/api/bookmarks/{DOCUMENT_ID}", None),
+    ("GET /settings/{user_id}", "GET", f"/settings/{USER_ID}", None),
+    ("DELETE /documents/delete/{document_id}", "DELETE", f"/documents/delete/{DELETED_DOCUMENT_ID}", None),
+]
+
+AUDIOBOOK_ROUTES = [
+    ("GET /audiobooks/user/{user_id}", "GET", f"/audiobooks/user/{USER_ID}", None),
+    ("GET /audiobooks/status/{audiobook_id}", "GET", f"/audiobooks/status/{DOCUMENT_ID}", None),
+    ("POST /audiobooks/generate/{document_id}", "POST", f"/audiobooks/generate/{DOCUMENT_ID}",
+     {"voice_id": 1, "user_id": USER_ID}),
+]
+
+
+def fill(engine):
+    db = sessionmaker(bind=engine)()
+    emails = [f"user{u}@example.com" for u in range(USERS)]
+    db.add_all([models.User(email=email, name="test", password="-") for email in emails])
+    db.add_all([Settings(user_id=email) for email in emails])
+    db.add(models.Voice(voice_id=1, voice="test"))
+    folders = DOCUMENTS // 10 + 1
+    db.add_all([Folder(folder_id=f, user_id=emails[f % USERS], folder_name=f"Folder {f}") for f in range(1, folders + 1)])
+    for document_id in range(1, DOCUMENTS + 1):
+        user_id = emails[document_id % USERS]
+        content_hash = f"{document_id:064x}"
+        db.add(Blob(content_hash=content_hash, file_path="-", size=0, ref_count=1))
+        db.add(Document(document_id=document_id, title=f"Document {document_id}", user_id=user_id, file_path="-",
+                        length=PAGES, folder_id=document_id % folders + 1, content_hash=content_hash))
+        db.add_all([DocumentPage(document_id=document_id, page_number=page, raw_text="Some page text.")
+                    for page in range(1, PAGES + 1)])
+        db.add(Note(document_id=document_id, note_title="Note", content="Some note text.", page=1))
+        db.add(Bookmark(document_id=document_id, page_number=1, description="A bookmark"))
+        db.add(AudioBook(audiobook_id=document_id, document_id=document_id, user_id=user_id, voice_id=1,
+                         duration=0.0, file_path="-"))
+        db.add(AudiobookJob(audiobook_id=document_id, user_id=user_id, status="running"))
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+    db.close()
+
+
+def full_scans(plan) -> list:
+    """The SCAN steps of an EXPLAIN QUERY PLAN (SEARCH steps use an index)."""
+    return [detail for detail in plan if detail.startswith("SCAN ") and detail != "SCAN CONSTANT ROW"]
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    engine = make_engine(url)
+    upgrade_database(engine)
+    fill(engine)
+
+    async_engine = make_engine(async_url(url), create=create_async_engine)
+    sessions = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    statements = []
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    yield engine, sessions, statements
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def client(database):
+    _, sessions, _ = database
+
+    async def get_test_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    for router in (documents.document_router, folders.folder_router, notes.router, bookmarks.router, settings.router):
+        app.include_router(router)
+    if audiobook is not None:
+        app.include_router(audiobook.audiobook_router)
+    app.dependency_overrides[get_async_db] = get_test_db
+    with TestClient(app) as client:
+        yield client
+
+
+def explain(engine, statements):
+    """{statement: its full scans} for the statements that have any."""
+    failures = {}
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            if full_scans(plan):
+                failures[statement] = plan
+    return failures
+
+
+def check_route(database, client, method, url, body):
+    engine, _, statements = database
+    statements.clear()
+    response = client.request(method, url, json=body)
+    assert response.is_success, response.text
+    assert statements, "the route sent no statements to the database"
+    assert explain(engine, statements) == {}
+
+
+@pytest.mark.parametrize("method, url, body", [route[1:] for route in ROUTES], ids=[route[0] for route in ROUTES])
+def test_route_uses_indexes(database, client, method, url, body):
+    check_route(database, client, method, url, body)
+
+
+@pytest.mark.skipif(audiobook is None, reason="the audiobook router needs the TTS stack (torch)")
+@pytest.mark.parametrize("method, url, body", [route[1:] for route in AUDIOBOOK_ROUTES],
+                         ids=[route[0] for route in AUDIOBOOK_ROUTES])
+def test_audiobook_route_uses_indexes(database, client, method, url, body):
+    check_route(database, client, method, url, body)
+
+
+def test_progress_flush_uses_indexes(database, client, monkeypatch):
+    """Writing buffered page turns, which also points unfinished audiobook jobs at the page being read."""
+    engine, sessions, statements = database
+    monkeypatch.setattr(progress_buffer, "session_factory", sessions)
+    progress_buffer.record(DOCUMENT_ID, 5)
+    statements.clear()
+    client.portal.call(progress_buffer.flush)
+    assert progress_buffer.get(DOCUMENT_ID) is None, "the flush failed"
+    assert statements, "the flush sent no statements to the database"
+    assert explain(engine, statements) == {}
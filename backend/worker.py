@@ -0,0 +1,185 @@
+"""
+Audiobook generation worker.
+
+Claims queued jobs from the audiobook_jobs table, synthesizes them and
+records progress, retries and failures. Run one or more of these next to
+the API (from the repository root):
+
+    python -m backend.worker
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+from backend.database import SessionLocal, engine
+from backend.models import AudiobookJob
+from backend.controllers.job_queue import claim_job, heartbeat, complete_job, fail_job, job_focus, JOB_LEASE_SECONDS
+from backend.controllers.transcoder import AUDIO_FORMATS
+from backend.controllers.tts_engine import shutdown_pools
+from backend.controllers.model_registry import preload_voices
+from backend.controllers.page_store import get_pages
+from backend.controllers.db_migrations import upgrade_database
+from backend.routers.audiobook import convert_document_to_audio_page_by_page, tts_pages
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds to sleep when the queue is empty
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", 2))
+
+# How often a running job re-reads the page the listener wants first
+FOCUS_POLL_SECONDS = float(os.getenv("FOCUS_POLL_SECONDS", 2))
+
+_stopping = threading.Event()
+
+
+class LeaseLost(Exception):
+    """Another worker took the job over; this one must stop writing its files."""
+
+
+class LeaseKeeper(threading.Thread):
+    """Renews the job lease, publishes page progress and tracks the reader's focus while a job runs."""
+
+    def __init__(self, job_id: int, worker_id: str):
+        super().__init__(name=f"lease-{job_id}", daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.pages_done = None
+        self.total_pages = None
+        self.cache_hits = None
+        self.cache_misses = None
+        self.lost = False
+        self._done = threading.Event()
+        self._focus = None
+        self._focus_read_at = None
+
+    def progress(self, pages_done: int, total_pages: int, cache_hits: int = None, cache_misses: int = None):
+        self.check()
+        self.pages_done = pages_done
+        self.total_pages = total_pages
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+
+    def focus(self):
+        """0-based page to synthesize next (None for document order), re-read every FOCUS_POLL_SECONDS."""
+        self.check()
+        now = time.monotonic()
+        if self._focus_read_at is None or now - self._focus_read_at >= FOCUS_POLL_SECONDS:
+            db = SessionLocal()
+            try:
+                self._focus = job_focus(db, self.job_id)
+            finally:
+                db.close()
+            self._focus_read_at = now
+        return self._focus - 1 if self._focus else None
+
+    def check(self):
+        """Called as pages finish and start: abort the synthesis once the lease is lost."""
+        if self.lost:
+            raise LeaseLost(f"Lost the lease on job {self.job_id}")
+
+    def run(self):
+        while not self._done.wait(JOB_LEASE_SECONDS / 3):
+            self.renew()
+
+    def renew(self):
+        db = SessionLocal()
+        try:
+            if not heartbeat(db, self.job_id, self.worker_id, self.pages_done, self.total_pages,
+                             self.cache_hits, self.cache_misses):
+                logger.warning(f"Lost the lease on job {self.job_id}")
+                self.lost = True
+        finally:
+            db.close()
+
+    def stop(self):
+        if self._done.is_set():
+            return
+        self._done.set()
+        self.join()
+        if not self.lost:
+            self.renew()  # Flush the final progress
+
+
+def run_job(job_id: int, worker_id: str):
+    db = SessionLocal()
+    lease = LeaseKeeper(job_id, worker_id)
+    lease.start()
+    try:
+        job = db.query(AudiobookJob).filter(AudiobookJob.job_id == job_id).first()
+        audiobook = job.audiobook
+        logger.info(f"Job {job.job_id}: audiobook {audiobook.audiobook_id}, attempt {job.attempts}")
+
+        try:
+            audio_format = next(f for f, spec in AUDIO_FORMATS.items() if audiobook.file_path.endswith(f".{spec['ext']}"))
+            # Text comes from the page store filled at upload, not from reparsing the PDF
+            pages = tts_pages(get_pages(db, audiobook.document))
+            duration = convert_document_to_audio_page_by_page(
+                pages,
+                audiobook.file_path,
+                audiobook.voice.voice,
+                audio_format,
+                job.bitrate,
+                on_progress=lease.progress,
+                focus=lease.focus,
+            )
+        except LeaseLost as e:
+            lease.stop()
+            logger.warning(f"{e}; stopped")
+            return
+        except Exception as e:
+            lease.stop()
+            logger.error(f"Job {job.job_id} failed: {e}", exc_info=True)
+            if not lease.lost:
+                db.refresh(job)
+                fail_job(db, job, str(e))
+            return
+
+        lease.stop()
+        if lease.lost:
+            return  # Another worker owns the job now
+        db.refresh(job)
+        audiobook.duration = duration
+        if not complete_job(db, job, worker_id):
+            logger.warning(f"Job {job.job_id} finished after another worker took it over; not recorded")
+            return
+        logger.info(f"Job {job.job_id} completed: {Path(audiobook.file_path).name}")
+    finally:
+        lease.stop()
+        db.close()
+
+
+def main():
+    upgrade_database(engine)
+    # Synthesis runs here, not in the API: warm up the TTS_PRELOAD_VOICES models (no-op when unset)
+    preload_voices()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    # Finish the current job on SIGTERM/SIGINT, then exit
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: _stopping.set())
+
+    logger.info(f"Worker {worker_id} started")
+    try:
+        while not _stopping.is_set():
+            db = SessionLocal()
+            try:
+                job = claim_job(db, worker_id)
+                job_id = job.job_id if job else None
+            finally:
+                db.close()
+
+            if job_id is None:
+                _stopping.wait(WORKER_POLL_SECONDS)
+                continue
+            run_job(job_id, worker_id)
+    finally:
+        shutdown_pools()
+        logger.info(f"Worker {worker_id} stopped")
+
+
+if __name__ == "__main__":
+    main()
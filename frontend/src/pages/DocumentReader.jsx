@@ -100,6 +100,10 @@ const DocumentReader = () => {
                         setAudioPath(statusResponse.data.file_path); // Update audioPath state
                         console.log("Audiobook ready. File path:", statusResponse.data.file_path);
                         setIsGeneratingAudiobook(false); // Stop polling
+                    } else if (statusResponse.data.status === "failed") {
+                        console.error("Audiobook generation failed:", statusResponse.data.error);
+                        alert("Audiobook generation failed. Please try again.");
+                        setIsGeneratingAudiobook(false); // Stop polling
                     } else {
                         // If not completed, poll again after 5 seconds
                         setTimeout(pollAudiobookStatus, 5000);